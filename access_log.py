@@ -0,0 +1,206 @@
+"""结构化访问日志：每个请求一行 JSON
+
+请求线程只做采样判断并把字段字典放入有界队列；序列化和写文件由单独的监听线程完成，
+行先在内存中攒批，满 buffer 行或空闲 flush_interval 秒后一次写入文件。
+队列写满时丢弃并计数，请求线程永远不会因为写日志而阻塞。
+应用日志（app.py 的 setup_logger）也使用这里的队列处理器和 fork 后自动重启的监听器。
+"""
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """队列已满时丢弃日志并计数，请求线程永远不会因为写日志而阻塞"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _PassthroughQueueHandler(NonBlockingQueueHandler):
+    """访问日志的消息是字典，原样入队，格式化留给监听线程"""
+
+    def prepare(self, record):
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')}
+        entry.update(record.msg)
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+
+
+class _BatchingMixin:
+    """攒够 capacity 行后一次写入；写前检查（轮转、重新打开）按批进行，而不是每行一次
+
+    每批在一次 write 中写出，多个进程以追加方式写同一个文件时行不会互相穿插。
+    """
+
+    def __init__(self, filename, capacity=256, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.capacity = capacity
+        self._pending = []
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # 尚未写出的行由父进程负责，子进程清空以免重复
+        self._pending = []
+
+    def emit(self, record):
+        try:
+            self._pending.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._pending) >= self.capacity:
+            self.flush()
+
+    def _before_write(self, size):
+        if self.stream is None:
+            self.stream = self._open()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._pending:
+                data, self._pending = ''.join(self._pending), []
+                self._before_write(len(data))
+                self.stream.write(data)
+            if self.stream is not None:
+                self.stream.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class BufferedRotatingFileHandler(_BatchingMixin, RotatingFileHandler):
+    """单进程使用：文件超过 maxBytes 后在进程内轮转"""
+
+    def _before_write(self, size):
+        super()._before_write(size)
+        if self.maxBytes > 0 and 0 < self.stream.tell() and self.stream.tell() + size >= self.maxBytes:
+            self.doRollover()
+
+
+class BufferedWatchedFileHandler(_BatchingMixin, WatchedFileHandler):
+    """多进程共用一个文件：由外部工具轮转，文件被移走后重新打开"""
+
+    def _before_write(self, size):
+        self.reopenIfNeeded()
+        super()._before_write(size)
+
+
+class ForkSafeQueueListener(QueueListener):
+    """与 queue_handler 配对的监听器，fork 后在子进程中自动重新启动（应用日志和访问日志共用）"""
+
+    def __init__(self, queue_handler, *handlers, respect_handler_level=False):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=respect_handler_level)
+        self.queue_handler = queue_handler
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # 父进程中未启动或已停止的监听器不需要重启
+        if self._thread is None:
+            return
+        # 子进程不继承监听线程；旧队列的锁可能正被父进程的线程持有，换新队列后重新启动
+        self.queue = self.queue_handler.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.queue_handler.dropped = 0
+        self._thread = None
+        self.start()
+
+
+class _FlushingQueueListener(ForkSafeQueueListener):
+    """队列空闲超过 flush_interval 秒时冲刷处理器，流量低时日志也能及时落盘"""
+
+    def __init__(self, queue_handler, *handlers, flush_interval=1.0):
+        super().__init__(queue_handler, *handlers)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+                if not block:
+                    raise
+
+
+class AccessLog:
+    """path 为空时不启用；sample_rate 小于 1 时按比例随机记录，5xx 响应总是记录
+
+    rotation 为 'external' 时不在进程内轮转，供多个 worker 共写一个文件（见 LOG_ROTATION）。
+    """
+
+    def __init__(self, path, sample_rate=1.0, buffer=256, flush_interval=1.0,
+                 queue_size=10000, max_bytes=0, backup_count=0, rotation='size'):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.enabled = bool(path) and sample_rate > 0
+        self.logger = logging.getLogger('access')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self._listener = None
+        self._handler = None
+        self._file_handler = None
+        if not self.enabled:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if rotation == 'external':
+                self._file_handler = BufferedWatchedFileHandler(path, capacity=buffer, encoding='utf-8')
+            else:
+                self._file_handler = BufferedRotatingFileHandler(
+                    path, capacity=buffer, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        except OSError as e:
+            # 只读文件系统上不记录访问日志，应用照常启动
+            logging.getLogger('app').warning(f"无法写入访问日志 {path}，已关闭访问日志：{e}")
+            self.enabled = False
+            return
+        self._file_handler.setFormatter(JSONFormatter())
+        self._handler = _PassthroughQueueHandler(queue.Queue(maxsize=queue_size))
+        self._listener = _FlushingQueueListener(self._handler, self._file_handler, flush_interval=flush_interval)
+        self.logger.addHandler(self._handler)
+        self._listener.start()
+
+    @property
+    def dropped(self):
+        return self._handler.dropped if self._handler is not None else 0
+
+    def sampled(self, status=200):
+        """在构造字段之前调用，未被采样的请求没有其他开销"""
+        if not self.enabled:
+            return False
+        return self.sample_rate >= 1 or status >= 500 or random.random() < self.sample_rate
+
+    def log(self, entry):
+        # 记录采样比例，统计时可以按 1/sample_rate 还原请求量
+        if self.sample_rate < 1 and entry.get('status', 0) < 500:
+            entry['sample_rate'] = self.sample_rate
+        self.logger.info(entry)
+
+    def stop(self):
+        """处理完队列中剩余的记录并写入文件"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self._file_handler.flush()
@@ -0,0 +1,111 @@
+import base64
+import binascii
+import json
+import logging
+
+logger = logging.getLogger('app')
+
+# 列表接口可投影的字段；详情接口额外提供 content
+LIST_FIELDS = ('record_id', 'title', 'quote', 'comment', 'preview', 'link', 'url')
+DETAIL_FIELDS = LIST_FIELDS + ('content',)
+
+
+class APIError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def encode_cursor(record_id):
+    return base64.urlsafe_b64encode(record_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        # validate=True 拒绝字母表以外的字符，否则 '@@@' 之类的输入会被解码为空串
+        record_id = base64.b64decode(padded.encode('ascii'), altchars=b'-_', validate=True).decode('utf-8')
+    except (binascii.Error, UnicodeError, ValueError):
+        raise APIError("无效的 cursor")
+    if not record_id:
+        raise APIError("无效的 cursor")
+    return record_id
+
+
+def parse_fields(value, allowed):
+    """解析 fields 参数，返回字段元组；未指定时返回全部字段"""
+    if not value:
+        return allowed
+    # 重复的字段只保留第一次出现的位置，否则 JSON 对象中会出现重复的键
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise APIError(f"未知字段: {', '.join(unknown)}")
+    return fields
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class ArticleIndex:
+    """文章JSON索引：同步快照时把每条记录的每个字段预先序列化为JSON片段
+
+    请求路径只按顺序拼接片段，不再序列化，也不访问飞书。传入上一个索引时，
+    修订号未变的记录直接沿用其摘要和片段（包括已生成的正文片段），只为变更的记录重新生成。
+    """
+
+    def __init__(self, snapshot, summarize, render_content, previous=None):
+        self.version = snapshot.version
+        self.order = []
+        self.position = {}
+        self._fragments = {}
+        self.summaries = {}
+        self._render_content = render_content
+        self._snapshot = snapshot
+
+        for record in snapshot.records:
+            record_id = record.get('record_id')
+            if not record_id:
+                continue
+            if previous is not None and record_id in previous.summaries \
+                    and previous._snapshot.revisions.get(record_id) == snapshot.revisions.get(record_id):
+                summary, fragments = previous.summaries[record_id], previous._fragments[record_id]
+            else:
+                try:
+                    summary = summarize(record)
+                except Exception as e:
+                    logger.error(f"序列化记录 {record_id} 时出错: {str(e)}")
+                    continue
+                fragments = {name: _dumps(summary.get(name)) for name in LIST_FIELDS}
+            self.position[record_id] = len(self.order)
+            self.order.append(record_id)
+            self.summaries[record_id] = summary
+            self._fragments[record_id] = fragments
+
+    def _object(self, record_id, fields):
+        fragments = self._fragments[record_id]
+        if 'content' in fields and 'content' not in fragments:
+            # 正文转换较重，首次请求详情时才生成，之后复用同一片段
+            fragments['content'] = _dumps(str(self._render_content(self._snapshot.get(record_id))))
+        return '{' + ','.join(f'"{name}":{fragments[name]}' for name in fields) + '}'
+
+    def page(self, cursor=None, limit=20, fields=LIST_FIELDS):
+        """返回一页列表的JSON字符串；cursor 为上一页最后一条记录的游标"""
+        start = 0
+        if cursor:
+            record_id = decode_cursor(cursor)
+            if record_id not in self.position:
+                raise APIError("cursor 已失效，请从第一页重新获取", status=410)
+            start = self.position[record_id] + 1
+
+        ids = self.order[start:start + limit]
+        next_cursor = encode_cursor(ids[-1]) if ids and start + limit < len(self.order) else None
+        items = ','.join(self._object(record_id, fields) for record_id in ids)
+        return f'{{"items":[{items}],"next_cursor":{_dumps(next_cursor)},"total":{len(self.order)}}}'
+
+    def detail(self, record_id, fields=DETAIL_FIELDS):
+        if record_id not in self._fragments:
+            raise APIError("文章不存在", status=404)
+        return self._object(record_id, fields)
@@ -1,15 +1,41 @@
-from flask import Flask, render_template
-from markupsafe import Markup
+from flask import Flask, render_template, Response, request, jsonify, send_file, g
+from flask.logging import default_handler
+from markupsafe import Markup, escape
 import requests
 import json
 import logging
 import ast # 新增导入
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, WatchedFileHandler
 import os
 import time # 新增导入
+import atexit
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
+from snapshot import Snapshot, RevisionCache, diff_snapshots
+from page_cache import PageCache
+from assets import AssetManifest
+from compression import compress_variants, negotiate
+from preview import make_preview
+from bulk_render import MARKDOWN, RICHTEXT, bulk_render
+from content import markdown_to_html, parse_richtext, richtext_to_html
+from search import SearchIndex
+from related import build_related
+from views import ViewCounter
+from coview import load_coviews
+from feed import build_entry, build_feed
+from sitemap import Sitemaps
+from media import MediaCache, is_valid_token
+from images import ImageDerivatives, collect_image_tokens, variant_token
+from timing import start_request, finish_request, phase, note, lookup
+from access_log import AccessLog, ForkSafeQueueListener, NonBlockingQueueHandler
+from profiling import RequestProfiler
+from feishu_fixtures import Recorder, Replayer
+from metrics import REGISTRY, RENDER_BUCKETS, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from api import ArticleIndex, APIError, LIST_FIELDS, DETAIL_FIELDS, parse_fields
 from bleach import clean
-from markdown import markdown
 from jinja2 import Environment, FileSystemLoader # 导入 Environment 和 FileSystemLoader
 
 app = Flask(__name__)
@@ -21,94 +47,18 @@ def nl2br(value):
 
 app.jinja_env.filters['nl2br'] = nl2br
 
+# 静态资源：压缩并按内容哈希命名，模板中通过 asset_url() 引用
+assets = AssetManifest(os.path.join(app.root_path, 'static'))
+app.jinja_env.globals['asset_url'] = assets.url
+
 def _convert_feishu_richtext_to_html(richtext_json):
     """将飞书富文本JSON转换为HTML"""
-    if not richtext_json:
-        return ""
-
+    start = time.perf_counter()
     try:
-        # 确保输入是字符串，并尝试解析为JSON
-        if isinstance(richtext_json, str):
-            data = json.loads(richtext_json)
-        elif isinstance(richtext_json, (list, dict)):
-            data = richtext_json
-        else:
-            return str(richtext_json) # 如果不是JSON也不是字符串，直接转字符串
-
-        if not isinstance(data, list):
-            # 如果不是列表，尝试从字典中获取'text'字段，或者直接返回其字符串表示
-            if isinstance(data, dict) and 'text' in data:
-                return clean(data['text'], tags=[], attributes={}, styles=[], strip=True)
-            return clean(str(data), tags=[], attributes={}, styles=[], strip=True)
-
-        html_parts = []
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-
-            obj_type = item.get('type')
-            content = item.get('text', '')
-            url = item.get('url', '')
-            children = item.get('children', [])
-
-            # 清理内容，只保留文本，避免XSS
-            cleaned_content = clean(content, tags=[], attributes={}, styles=[], strip=True)
-
-            if obj_type == 'text':
-                text = cleaned_content
-                if item.get('bold'):
-                    text = f"<strong>{text}</strong>"
-                if item.get('italic'):
-                    text = f"<em>{text}</em>"
-                if item.get('underline'):
-                    text = f"<u>{text}</u>"
-                if item.get('strikethrough'):
-                    text = f"<s>{text}</s>"
-                if item.get('code'):
-                    text = f"<code>{text}</code>"
-                html_parts.append(text)
-            elif obj_type == 'paragraph':
-                # 递归处理段落内的子元素
-                paragraph_content = _convert_feishu_richtext_to_html(children)
-                html_parts.append(f"<p>{paragraph_content}</p>")
-            elif obj_type == 'heading1':
-                html_parts.append(f"<h1>{cleaned_content}</h1>")
-            elif obj_type == 'heading2':
-                html_parts.append(f"<h2>{cleaned_content}</h2>")
-            elif obj_type == 'heading3':
-                html_parts.append(f"<h3>{cleaned_content}</h3>")
-            elif obj_type == 'bulleted_list':
-                list_items = []
-                for child in children:
-                    if child.get('type') == 'list_item':
-                        list_items.append(f"<li>{_convert_feishu_richtext_to_html(child.get('children', []))}</li>")
-                html_parts.append(f"<ul>{''.join(list_items)}</ul>")
-            elif obj_type == 'ordered_list':
-                list_items = []
-                for child in children:
-                    if child.get('type') == 'list_item':
-                        list_items.append(f"<li>{_convert_feishu_richtext_to_html(child.get('children', []))}</li>")
-                html_parts.append(f"<ol>{''.join(list_items)}</ol>")
-            elif obj_type == 'code_block':
-                html_parts.append(f"<pre><code>{cleaned_content}</code></pre>")
-            elif obj_type == 'quote':
-                html_parts.append(f"<blockquote>{cleaned_content}</blockquote>")
-            elif obj_type == 'hr':
-                html_parts.append("<hr>")
-            elif obj_type == 'image':
-                # 飞书图片通常需要特殊处理，这里简化为显示一个占位符或跳过
-                html_parts.append(f"<p>[图片: {cleaned_content}]</p>")
-            elif obj_type == 'link':
-                html_parts.append(f"<a href=\"{clean(url, tags=[], attributes={}, styles=[], strip=True)}\">{cleaned_content}</a>")
-            # 可以根据需要添加更多类型
-
-        return Markup(''.join(html_parts))
-    except json.JSONDecodeError as e:
-        app.logger.error(f"JSON解析错误: {e} - 原始数据: {richtext_json}")
-        return clean(str(richtext_json), tags=[], attributes={}, styles=[], strip=True) # 解析失败返回清理后的原始字符串
-    except Exception as e:
-        app.logger.error(f"富文本转换错误: {e} - 原始数据: {richtext_json}")
-        return clean(str(richtext_json), tags=[], attributes={}, styles=[], strip=True)
+        with phase('richtext'):
+            return richtext_to_html(richtext_json, _image_widths())
+    finally:
+        RENDER_SECONDS.observe(time.perf_counter() - start, 'richtext')
 
 def _convert_to_string(value):
     """将值转换为字符串，处理列表和字典类型"""
@@ -163,45 +113,141 @@ app.config.from_object(Config)
 
 # 配置日志
 def setup_logger():
+    """日志经队列交给单独的监听线程写入控制台和滚动文件，返回监听器"""
     # 设置日志格式
     formatter = logging.Formatter(Config.LOG_FORMAT)
+    level = getattr(logging, Config.LOG_LEVEL)
 
     # 控制台处理器，将日志输出到标准输出 (stdout)
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    console_handler.setLevel(getattr(logging, Config.LOG_LEVEL))
+    console_handler.setLevel(level)
+    handlers = [console_handler]
+
+    file_error = None
+    if Config.LOG_FILE:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(Config.LOG_FILE)), exist_ok=True)
+            if Config.LOG_ROTATION == 'external':
+                # 多个 worker 共用一个文件：各进程以追加方式写入，由外部工具轮转，文件被移走后自动重新打开
+                file_handler = WatchedFileHandler(Config.LOG_FILE, encoding='utf-8')
+            else:
+                # 滚动文件处理器，单个文件超过 LOG_MAX_BYTES 后轮转，保留 LOG_BACKUP_COUNT 个备份
+                file_handler = RotatingFileHandler(
+                    Config.LOG_FILE,
+                    maxBytes=Config.LOG_MAX_BYTES,
+                    backupCount=Config.LOG_BACKUP_COUNT,
+                    encoding='utf-8'
+                )
+        except OSError as e:
+            # 只读文件系统（如 Vercel）上无法创建日志文件，只输出到控制台，不影响应用启动
+            file_error = e
+        else:
+            file_handler.setFormatter(formatter)
+            file_handler.setLevel(level)
+            handlers.append(file_handler)
 
-    # 添加处理器到应用日志器
-    app.logger.addHandler(console_handler)
+    # 请求线程只把日志放入队列，格式化后的写入由监听线程完成
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=Config.LOG_QUEUE_SIZE))
+    listener = ForkSafeQueueListener(queue_handler, *handlers, respect_handler_level=True)
+    listener.start()
+
+    # Flask 默认的处理器会同步写 stderr，并导致每条日志输出两次
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(queue_handler)
     
     # 设置日志级别
-    app.logger.setLevel(getattr(logging, Config.LOG_LEVEL))
+    app.logger.setLevel(level)
+    if file_error is not None:
+        app.logger.warning(f"无法写入日志文件 {Config.LOG_FILE}，只输出到控制台：{file_error}")
+
+    def stop():
+        # 退出时处理完队列中剩余的日志
+        listener.stop()
+        if queue_handler.dropped:
+            for handler in handlers:
+                handler.handle(logging.makeLogRecord({
+                    'name': app.logger.name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': f"日志队列已满，共丢弃 {queue_handler.dropped} 条日志"
+                }))
+    atexit.register(stop)
+    return listener
 
 # 初始化日志配置
-setup_logger()
+log_listener = setup_logger()
+
+# 指标：通过 /metrics 以 Prometheus 文本格式导出
+FEISHU_REQUEST_SECONDS = REGISTRY.histogram(
+    'feishu_request_seconds', '飞书接口单次请求耗时（秒），按接口和返回码', ('endpoint', 'code'))
+FEISHU_RETRIES = REGISTRY.counter('feishu_retries_total', '飞书接口重试次数', ('endpoint',))
+CACHE_LOOKUPS = REGISTRY.counter('cache_lookups_total', '各层缓存的查找结果（hit/miss/stale）', ('layer', 'result'))
+RENDER_SECONDS = REGISTRY.histogram('render_seconds', '内容转换和页面渲染耗时（秒）', ('kind',), buckets=RENDER_BUCKETS)
+EXTERNAL_FETCH_SECONDS = REGISTRY.histogram('external_fetch_seconds', '抓取外部链接内容的耗时（秒）', ('outcome',))
+slow_logger = logging.getLogger('app.slow')
+HTTP_REQUEST_SECONDS = REGISTRY.histogram('http_request_seconds', '各路由的请求处理耗时（秒）', ('route', 'method', 'status'))
+
+def _record_lookup(layer, result):
+    """缓存查找结果同时计入指标和当前请求的计时器（访问日志的 cache 字段）"""
+    CACHE_LOOKUPS.inc(layer, result)
+    lookup(layer, result)
+
+# 结构化访问日志：每个请求一行 JSON，由单独的线程攒批写入
+access_log = AccessLog(
+    Config.ACCESS_LOG_FILE,
+    sample_rate=Config.ACCESS_LOG_SAMPLE_RATE,
+    buffer=Config.ACCESS_LOG_BUFFER,
+    flush_interval=Config.ACCESS_LOG_FLUSH_SECONDS,
+    queue_size=Config.LOG_QUEUE_SIZE,
+    max_bytes=Config.ACCESS_LOG_MAX_BYTES,
+    backup_count=Config.LOG_BACKUP_COUNT,
+    rotation=Config.LOG_ROTATION
+)
+atexit.register(access_log.stop)
+# 按顺序检查，第一个命中的缓存层即为响应的来源
+_SERVING_LAYERS = ('page', 'media', 'snapshot')
+
+# 录制或回放飞书接口响应（见 feishu_fixtures.py），用于离线复现真实数据形态
+if Config.FEISHU_REPLAY_PATH:
+    feishu_transport = Replayer(Config.FEISHU_REPLAY_PATH, Config.FEISHU_API_BASE_URL, speed=Config.FEISHU_REPLAY_SPEED).install()
+    app.logger.warning(f"飞书接口回放模式：{Config.FEISHU_REPLAY_PATH}")
+elif Config.FEISHU_RECORD_PATH:
+    feishu_transport = Recorder(
+        Config.FEISHU_RECORD_PATH,
+        Config.FEISHU_API_BASE_URL,
+        secrets=[Config.FEISHU_APP_ID, Config.FEISHU_APP_SECRET, Config.FEISHU_BASE_ID, Config.FEISHU_TABLE_ID]
+    ).install()
+    app.logger.warning(f"飞书接口录制模式：{Config.FEISHU_RECORD_PATH}")
 
-def _make_api_request(method, url, headers=None, json_data=None, params=None, timeout=None, error_prefix="API请求"):
-    """通用API请求函数，包含重试和错误处理"""
+def _make_api_request(method, url, headers=None, json_data=None, params=None, timeout=None, error_prefix="API请求", endpoint="other"):
+    """通用API请求函数，包含重试和错误处理；endpoint 用作指标标签"""
     for retry in range(Config.MAX_RETRIES):
+        if retry:
+            FEISHU_RETRIES.inc(endpoint)
+        start = time.perf_counter()
+        code = 'network_error'
         try:
             app.logger.debug(f"尝试 {method} 请求: {url}, 重试次数: {retry + 1}")
-            response = requests.request(
-                method,
-                url,
-                headers=headers,
-                json=json_data,
-                params=params,
-                timeout=timeout if timeout is not None else Config.REQUEST_TIMEOUT
-            )
+            with phase(f"feishu_{endpoint}"):
+                response = requests.request(
+                    method,
+                    url,
+                    headers=headers,
+                    json=json_data,
+                    params=params,
+                    timeout=timeout if timeout is not None else Config.REQUEST_TIMEOUT
+                )
+            code = f"http_{response.status_code}"
             response.raise_for_status()  # 检查HTTP状态码，如果不是2xx，则抛出HTTPError
             
             try:
                 result = response.json()
             except json.JSONDecodeError as e:
+                code = 'invalid_json'
                 error_msg = f"{error_prefix}响应解析失败：{str(e)}"
                 app.logger.error(error_msg)
                 return None, error_msg
 
+            code = str(result.get('code', -1))
             if result.get('code', -1) == 0:
                 return result, None
             else:
@@ -210,6 +256,7 @@ def _make_api_request(method, url, headers=None, json_data=None, params=None, ti
                 return None, error_msg
 
         except requests.exceptions.Timeout:
+            code = 'timeout'
             if retry < Config.MAX_RETRIES - 1:
                 app.logger.warning(f"{error_prefix}请求超时，正在重试 ({retry + 1}/{Config.MAX_RETRIES})")
                 continue
@@ -226,9 +273,12 @@ def _make_api_request(method, url, headers=None, json_data=None, params=None, ti
                 app.logger.error(error_msg)
                 return None, error_msg
         except Exception as e:
+            code = 'exception'
             error_msg = f"{error_prefix}系统错误：{str(e)}"
             app.logger.error(error_msg)
             return None, error_msg
+        finally:
+            FEISHU_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint, code)
     return None, f"{error_prefix}：未知错误或所有重试均失败"
 
 feishu_token_cache = {'token': None, 'expire_time': 0}
@@ -254,7 +304,8 @@ def get_feishu_token():
         Config.FEISHU_AUTH_URL,
         headers=headers,
         json_data=request_body,
-        error_prefix="获取飞书访问令牌"
+        error_prefix="获取飞书访问令牌",
+        endpoint="tenant_access_token"
     )
 
     if error:
@@ -297,7 +348,8 @@ def get_node_token(token, node_token):
         url,
         headers=headers,
         params=params,
-        error_prefix="获取知识空间节点信息"
+        error_prefix="获取知识空间节点信息",
+        endpoint="get_node"
     )
 
     if error:
@@ -313,6 +365,18 @@ def get_node_token(token, node_token):
         app.logger.error(error_msg)
         return None, error_msg
 
+# 知识空间节点对应的多维表格 app_token 很少变化，缓存后每次同步少一次接口调用
+feishu_node_cache = {}
+
+def resolve_app_token(token, node_token):
+    cached = feishu_node_cache.get(node_token)
+    if cached and time.time() < cached[1]:
+        return cached[0], None
+    app_token, error = get_node_token(token, node_token)
+    if not error:
+        feishu_node_cache[node_token] = (app_token, time.time() + Config.NODE_CACHE_TTL)
+    return app_token, error
+
 def get_table_records():
     """获取飞书多维表格记录"""
     token = get_feishu_token()
@@ -320,7 +384,7 @@ def get_table_records():
         return [], "无法获取飞书访问令牌"
 
     node_token = app.config['FEISHU_BASE_ID']
-    app_token, error = get_node_token(token, node_token)
+    app_token, error = resolve_app_token(token, node_token)
     if error:
         return [], error
     
@@ -342,29 +406,96 @@ def get_table_records():
     # 构建多维表格API请求URL
     url = f"{Config.FEISHU_BITABLE_URL}/apps/{app_token}/tables/{table_id}/records"
     params = {
-        "page_size": 20
+        "page_size": Config.FEISHU_PAGE_SIZE,
+        "automatic_fields": "true"  # 返回 last_modified_time，用于 feed 和 sitemap 的更新时间
     }
     
     app.logger.info(f"请求URL: {url}")
     
-    result, error = _make_api_request(
-        'get',
-        url,
-        headers=headers,
-        params=params,
-        error_prefix="获取飞书多维表格记录"
-    )
+    # 按 page_token 逐页拉取，直到 has_more 为 False
+    items = []
+    while True:
+        result, error = _make_api_request(
+            'get',
+            url,
+            headers=headers,
+            params=params,
+            error_prefix="获取飞书多维表格记录",
+            endpoint="list_records"
+        )
 
-    if error:
-        return [], error
+        if error:
+            return [], error
+
+        data = result.get('data', {})
+        items.extend(data.get('items') or [])
+        page_token = data.get('page_token')
+        if not data.get('has_more') or not page_token:
+            break
+        params = dict(params, page_token=page_token)
 
-    items = result.get('data', {}).get('items', [])
     app.logger.info(f"成功获取多维表格数据：{len(items)}条记录")
     return items, None
         
 
 
 
+def download_feishu_media(file_token):
+    """下载飞书素材，返回 (字节, MIME类型, 错误信息)"""
+    token = get_feishu_token()
+    if not token:
+        return None, None, "无法获取飞书访问令牌"
+
+    url = f"{Config.FEISHU_API_BASE_URL}/drive/v1/medias/{file_token}/download"
+    headers = {"Authorization": f"Bearer {token}"}
+    for retry in range(Config.MAX_RETRIES):
+        if retry:
+            FEISHU_RETRIES.inc('media_download')
+        start = time.perf_counter()
+        code = 'network_error'
+        try:
+            app.logger.info(f"正在下载飞书素材: {file_token}")
+            # stream=True 的响应在提前返回时也要关闭，否则连接不会归还连接池
+            with phase('feishu_media_download'), \
+                    requests.get(url, headers=headers, timeout=Config.REQUEST_TIMEOUT, stream=True) as response:
+                code = f"http_{response.status_code}"
+                response.raise_for_status()
+
+                mimetype = response.headers.get('Content-Type', 'application/octet-stream').split(';')[0].strip()
+                if not mimetype.startswith('image/'):
+                    return None, None, f"不支持的素材类型：{mimetype}"
+
+                chunks, size = [], 0
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > Config.MEDIA_MAX_BYTES:
+                        return None, None, "素材超过大小限制"
+                    chunks.append(chunk)
+            return b''.join(chunks), mimetype, None
+        except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                code = 'timeout'
+            status = e.response.status_code if e.response is not None else None
+            # 4xx（限流 429 除外）重试也不会成功，直接返回
+            retryable = status is None or status == 429 or status >= 500
+            if retryable and retry < Config.MAX_RETRIES - 1:
+                app.logger.warning(f"下载飞书素材失败：{str(e)}，正在重试 ({retry + 1}/{Config.MAX_RETRIES})")
+                continue
+            error_msg = f"下载飞书素材失败：{str(e)}"
+            app.logger.error(error_msg)
+            return None, None, error_msg
+        finally:
+            FEISHU_REQUEST_SECONDS.observe(time.perf_counter() - start, 'media_download', code)
+    return None, None, "下载飞书素材：所有重试均失败"
+
+media_cache = MediaCache(Config.MEDIA_CACHE_DIR, on_lookup=lambda result: _record_lookup('media', result),
+                         failure_ttl=Config.MEDIA_FAILURE_TTL)
+image_derivatives = ImageDerivatives(media_cache, download_feishu_media, Config.IMAGE_VARIANT_WIDTHS, workers=Config.IMAGE_WORKERS)
+
+def _image_widths():
+    """富文本图片输出 srcset 时使用的宽度；未启用缩略图时为空"""
+    return image_derivatives.widths if image_derivatives.enabled else ()
+
 def get_article_fields(record):
     """从记录中提取字段数据"""
     if 'fields' in record:
@@ -375,96 +506,423 @@ def get_article_fields(record):
 
 def process_article_content(content, is_preview=False):
     """处理文章内容"""
+    start = time.perf_counter()
+    try:
+        with phase('preview' if is_preview else 'markdown'):
+            return _process_article_content(content, is_preview)
+    finally:
+        RENDER_SECONDS.observe(time.perf_counter() - start, 'preview' if is_preview else 'markdown')
+
+def _process_article_content(content, is_preview):
     if not content:
         return ''
-    
     if is_preview:
-        # 预览模式只返回前100个字符
-        return content[:100] + '...' if len(content) > 100 else content
+        # 预览模式：去除 Markdown 标记后按字素截断到100个字符以内
+        return make_preview(content, limit=Config.PREVIEW_LENGTH)
+    # 完整模式将Markdown转换为安全的HTML
+    return markdown_to_html(content)
+
+def _extract_external_link(fields):
+    """从“链接”字段中取出URL，字段可能是字符串或 {'link': ..., 'text': ...} 字典"""
+    raw_external_link = fields.get('链接', '')
+    if isinstance(raw_external_link, dict):
+        return raw_external_link.get('link') or raw_external_link.get('url')
+    elif isinstance(raw_external_link, str):
+        return raw_external_link
+    return None
+
+def _summarize_record(record):
+    """提取首页卡片和API列表共用的文章摘要"""
+    fields = get_article_fields(record)
+    record_id = record.get('record_id')
+
+    # 预览在同步时生成一次：富文本先转为HTML，其余先转为字符串，再去除标记并截断
+    body = fields.get('概要内容输出', '')
+    segments = parse_richtext(body)
+    if segments is not None:
+        raw_content = str(_convert_feishu_richtext_to_html(segments))
     else:
-        # 完整模式将Markdown转换为安全的HTML
-        # 确保 content 是字符串类型
-        content_str = str(content)
-        app.logger.debug(f"process_article_content: Input to markdown: type={type(content_str)}, value={content_str[:200]}...") # Log first 200 chars
-        html_content = markdown(content_str)
-        app.logger.debug(f"process_article_content: Output from markdown: type={type(html_content)}, value={html_content[:200]}...") # Log first 200 chars
-        app.logger.debug(f"process_article_content: html_content type after markdown: {type(html_content)}")
-        app.logger.debug(f"process_article_content: Input to clean: type={type(html_content)}, value={html_content[:200]}...")
-        if isinstance(html_content, list):
-            html_content = str(html_content) # Convert list to string if it's a list
-            app.logger.debug(f"process_article_content: Converted html_content from list to string: type={type(html_content)}, value={html_content[:200]}...")
-        
-        cleaned_content = clean(
-            html_content,
-            tags=['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'em', 'ul', 'ol', 'li', 'blockquote', 'code', 'pre', 'br'],
-            attributes={'*': ['class']},
-            strip=True
-        )
-        app.logger.debug(f"process_article_content: Output from clean: type={type(cleaned_content)}, value={cleaned_content[:200]}...") # Log first 200 chars
-        return cleaned_content
+        raw_content = _convert_to_string(body)
+    preview_content = process_article_content(raw_content, is_preview=True)
+
+    # 清理和转义内容
+    title_content = _convert_to_string(fields.get('标题', '无标题'))
+    app.logger.debug(f"Clean input for title: type={type(title_content)}, value={title_content}")
+    quote_content = _convert_to_string(fields.get('金句输出', ''))
+    app.logger.debug(f"Clean input for quote: type={type(quote_content)}, value={quote_content}")
+    comment_content = _convert_to_string(fields.get('黄叔点评', ''))
+    app.logger.debug(f"Clean input for comment: type={type(comment_content)}, value={comment_content}")
+
+    summary = {
+        'record_id': record_id,
+        'title': clean(title_content, strip=True),
+        'quote': clean(quote_content, strip=True),
+        'comment': clean(comment_content, strip=True),
+        'preview': preview_content,
+        'preview_html': escape(preview_content),
+        'link': _extract_external_link(fields),
+        'url': f"/article/{record_id}"
+    }
+
+    # 确保标题字段有值
+    if not summary['title']:
+        summary['title'] = '无标题'
+        app.logger.warning(f"记录 {record_id} 没有标题，使用默认值")
+    return summary
+
+def _search_document(record, summary):
+    """构造检索文档：标题、金句、点评和正文"""
+    fields = get_article_fields(record)
+    return {
+        'title': summary['title'],
+        'quote': summary['quote'],
+        'comment': summary['comment'],
+        'body': _convert_to_string(fields.get('概要内容输出', ''))
+    }
+
+def _render_record_content(record):
+    """将记录的概要内容转换为安全的HTML；飞书富文本（含图片）走富文本转换，其余按 Markdown 处理"""
+    body = get_article_fields(record).get('概要内容输出', '')
+    segments = parse_richtext(body)
+    if segments is not None:
+        return str(_convert_feishu_richtext_to_html(segments))
+    return process_article_content(body, is_preview=False)
+
+def _body_job(record):
+    """批量渲染任务，与 _render_record_content 的分支一致"""
+    body = get_article_fields(record).get('概要内容输出', '')
+    segments = parse_richtext(body)
+    if segments is not None:
+        return RICHTEXT, segments
+    return MARKDOWN, body
+
+def _body_image_tokens(record):
+    """正文中会渲染为图片的 file_token"""
+    segments = parse_richtext(get_article_fields(record).get('概要内容输出', ''))
+    return frozenset(collect_image_tokens(segments)) if segments is not None else frozenset()
+
+# 按记录修订号缓存渲染后的正文HTML，详情页、JSON接口和 feed 共用
+content_cache = RevisionCache(on_lookup=lambda result: _record_lookup('content', result))
+feed_entry_cache = RevisionCache(on_lookup=lambda result: _record_lookup('feed_entry', result))
+card_cache = RevisionCache(on_lookup=lambda result: _record_lookup('card', result))
+
+def _cached_content(record):
+    record_id = record.get('record_id')
+    revision = _snapshot.revisions.get(record_id) if _snapshot else None
+    return content_cache.get(record_id, revision, lambda: _render_record_content(record))
+
+# 快照与页面缓存：请求路径只读取内存中的快照，飞书数据在后台同步
+_snapshot = None
+# 快照和由它生成的文章索引作为一个元组一起发布，需要两者的读取方一次取出，不会拿到不同版本
+_published = (None, None)
+_related = {}
+_coviews = {}
+_coview_mtime = None
+# /media 只代理当前快照正文中出现的图片：{record_id: file_token 集合} 及其并集
+_record_images = {}
+_media_tokens = frozenset()
+_background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshot-derived')
+_snapshot_lock = threading.Lock()
+_sync_lock = threading.Lock()
+search_index = SearchIndex()
+view_counter = ViewCounter(
+    Config.VIEW_DB_PATH,
+    flush_interval=Config.VIEW_FLUSH_INTERVAL,
+    half_life=Config.TRENDING_HALF_LIFE
+)
+_sync_in_progress = threading.Event()
+_cold_sync_lock = threading.Lock()
+_cold_sync = {'attempt': 0, 'error': None}
+# 预热（warm_up）期间为 True：sync_snapshot 只记录派生任务，不在主进程中启动线程
+_defer_derived = False
+_deferred_derived = None
+
+page_cache = PageCache(
+    revalidate_seconds=Config.PAGE_REVALIDATE_SECONDS,
+    max_workers=Config.PAGE_REBUILD_WORKERS,
+    context_factory=lambda: app.test_request_context('/'),
+    compress=lambda body: compress_variants(body, Config.COMPRESSION_LEVEL, Config.COMPRESSION_MIN_SIZE)
+)
+
+def sync_snapshot():
+    """从飞书同步记录并生成新快照，返回 (变更的 record_id 集合, 错误信息)"""
+    global _snapshot, _published, _media_tokens, _deferred_derived
 
-@app.route('/')
-def index():
-    app.logger.info("进入 index 路由")
-    # 获取文章列表
     records, error = get_table_records()
-    articles = []
-    
-    # 如果从API获取不到数据，返回错误信息
-    if not records:
-        app.logger.error(f"获取文章列表失败：{error}")
-        return render_template('error.html', error=error), 500
+    if error:
+        app.logger.error(f"同步快照失败：{error}")
+        return None, error
 
-    # 处理API返回的记录
-    for i, record in enumerate(records):
-        try:
-            fields = get_article_fields(record)
-
-            # 获取并处理内容
-            raw_content = fields.get('概要内容输出', '')
-            preview_content = process_article_content(raw_content, is_preview=True)
-
-            # 清理和转义内容
-            title_content = _convert_to_string(fields.get('标题', '无标题'))
-            app.logger.debug(f"Clean input for title: type={type(title_content)}, value={title_content}")
-            quote_content = _convert_to_string(fields.get('金句输出', ''))
-            app.logger.debug(f"Clean input for quote: type={type(quote_content)}, value={quote_content}")
-            comment_content = _convert_to_string(fields.get('黄叔点评', ''))
-            app.logger.debug(f"Clean input for comment: type={type(comment_content)}, value={comment_content}")
-
-            article = {
-                'record_id': record.get('record_id'),  # 添加 record_id
-                'title': clean(title_content, strip=True),
-                'quote': clean(quote_content, strip=True),
-                'comment': clean(comment_content, strip=True),
-                'content': preview_content
-            }
-
-            # 确保标题字段有值
-            if not article['title']:
-                article['title'] = '无标题'
-                app.logger.warning(f"记录 {i + 1} 没有标题，使用默认值")
-
-            articles.append(article)
-        except Exception as e:
-            app.logger.error(f"处理记录 {i + 1} 时出错: {str(e)}")
+    # 同一时间只构建一个快照；构建索引时不持有 _snapshot_lock，读取方只在替换时等待
+    with _sync_lock:
+        old = _snapshot
+        new = Snapshot(records, version=(old.version + 1) if old else 1, previous=old)
+        changed = diff_snapshots(old, new)
+        # JSON索引随快照一起生成，API请求只拼接预先序列化的片段
+        index = ArticleIndex(new, _summarize_record, _cached_content, previous=_published[1])
+        with _snapshot_lock:
+            _published = (new, index)
+            _snapshot = new
+
+    for record_id in changed:
+        record = new.get(record_id)
+        if record is None:
+            _record_images.pop(record_id, None)
+        else:
+            _record_images[record_id] = _body_image_tokens(record)
+    _media_tokens = frozenset().union(*_record_images.values())
+
+    # 检索索引只更新发生变更的记录
+    search_index.update(
+        {record_id: _search_document(new.get(record_id), index.summaries[record_id])
+         for record_id in changed if record_id in index.summaries},
+        removed=[record_id for record_id in changed if record_id not in index.summaries]
+    )
+
+    # 有变更时 IDF 随语料变化，需要整体重算近邻
+    documents = {
+        record_id: ' '.join(_search_document(new.get(record_id), summary).values())
+        for record_id, summary in index.summaries.items()
+    } if changed else None
+    stale = [record_id for record_id in changed if new.get(record_id) is not None]
+    if _defer_derived:
+        # 预加载的主进程只同步快照，派生任务留到 fork 之后在每个 worker 中启动
+        _deferred_derived = (new, documents, stale)
+    else:
+        _start_derived(new, documents, stale)
+        # 新增或修改的记录正文中的图片在后台线程池下载并生成缩略图；其他字段中的附件不会出现在页面上
+        image_tokens = set().union(*(_record_images[record_id] for record_id in stale))
+        if image_tokens and image_derivatives.submit(image_tokens):
+            app.logger.info(f"已提交图片缩略图任务 - 图片数: {len(image_tokens)}")
+
+    _reload_coviews()
+    for cache in (content_cache, feed_entry_cache, card_cache):
+        cache.prune(new)
+    app.logger.info(f"快照同步完成 - 版本: {new.version}, 记录数: {len(new)}, 变更: {len(changed)}")
+    if old is not None and changed:
+        # 只重建受影响的详情页和首页，已删除记录的页面直接丢弃
+        for record_id in changed:
+            if new.get(record_id) is None:
+                page_cache.discard(f'article:{record_id}')
+        index_pages = [key for key in page_cache.keys() if key.startswith('index:')]
+        for key in index_pages:
+            # 记录减少后多出来的首页分页直接丢弃
+            if int(key.split(':')[1]) > _index_page_count(new):
+                page_cache.discard(key)
+        page_cache.rebuild(index_pages + [f'article:{record_id}' for record_id in changed if new.get(record_id) is not None])
+    return changed, None
+
+def _start_derived(snapshot, documents, stale):
+    """在后台线程中重算相关文章，大批量变更（首次同步、全表修改）时用进程池预先渲染正文"""
+    if documents is not None:
+        # 计算较重，放到后台线程，详情页只做字典查找
+        _background_executor.submit(_rebuild_related, documents)
+    if len(stale) >= Config.BULK_RENDER_THRESHOLD:
+        _background_executor.submit(_prerender_content, snapshot, stale)
+
+def _rebuild_related(documents):
+    global _related
+    try:
+        start = time.time()
+        _related = build_related(documents, k=Config.RELATED_ARTICLES_COUNT)
+        app.logger.info(f"相关文章计算完成 - 文章数: {len(documents)}, 耗时: {time.time() - start:.2f}s")
+    except Exception as e:
+        app.logger.error(f"计算相关文章失败: {str(e)}")
+
+def _prerender_content(snapshot, record_ids):
+    start = time.time()
+    jobs = [_body_job(snapshot.get(record_id)) for record_id in record_ids]
+    try:
+        results = bulk_render(jobs, workers=Config.RENDER_WORKERS or None, image_widths=_image_widths())
+    except Exception as e:
+        app.logger.error(f"批量渲染正文失败: {str(e)}")
+        return
+    failed = 0
+    for record_id, html in zip(record_ids, results):
+        # 渲染失败的记录不写入缓存，首次访问时再按常规路径渲染
+        if html is None:
+            failed += 1
             continue
-    
-    app.logger.info(f"成功处理 {len(articles)} 篇文章")
-    return render_template('index.html', articles=articles)
+        content_cache.put(record_id, snapshot.revisions[record_id], html)
+    app.logger.info(f"批量渲染完成 - 文章数: {len(record_ids)}, 失败: {failed}, 耗时: {time.time() - start:.2f}s")
 
-@app.route('/article/<record_id>')
-def article(record_id):
-    app.logger.info(f"进入 article 路由，record_id: {record_id}")
-    records, error = get_table_records()
-    
-    # 如果获取数据失败，返回错误信息
+def _reload_coviews():
+    """共现推荐由离线任务 coview.py 生成，文件更新后随快照同步重新加载"""
+    global _coviews, _coview_mtime
+    try:
+        mtime = os.path.getmtime(Config.COVIEW_PATH)
+    except OSError:
+        return
+    if mtime == _coview_mtime:
+        return
+    try:
+        _coviews = load_coviews(Config.COVIEW_PATH)
+        _coview_mtime = mtime
+        app.logger.info(f"已加载共现推荐 - 文章数: {len(_coviews)}")
+    except (OSError, ValueError) as e:
+        app.logger.error(f"加载共现推荐失败: {str(e)}")
+
+def _background_sync():
+    try:
+        sync_snapshot()
+    finally:
+        _sync_in_progress.clear()
+
+def get_snapshot():
+    """返回 (快照, 错误信息)；首次调用时同步拉取，过期后在后台刷新"""
+    if _deferred_derived is not None and not _defer_derived:
+        _start_deferred_derived()
+    snapshot = _snapshot
+    if snapshot is None:
+        # 冷启动时只有一个请求同步，其余请求等待并共用它的结果，失败时也不再各自重试
+        attempt = _cold_sync['attempt']
+        with _cold_sync_lock:
+            snapshot = _snapshot
+            if snapshot is None:
+                if _cold_sync['attempt'] != attempt:
+                    return None, _cold_sync['error']
+                _record_lookup('snapshot', 'miss')
+                with phase('snapshot_sync'):
+                    _, error = sync_snapshot()
+                _cold_sync['attempt'] += 1
+                _cold_sync['error'] = error
+                if error:
+                    return None, error
+                return _snapshot, None
+
+    if time.time() - snapshot.built_at >= Config.SNAPSHOT_TTL:
+        _record_lookup('snapshot', 'stale')
+        if not _sync_in_progress.is_set():
+            _sync_in_progress.set()
+            threading.Thread(target=_background_sync, name='snapshot-sync', daemon=True).start()
+    else:
+        _record_lookup('snapshot', 'hit')
+    return snapshot, None
+
+def warm_up():
+    """在接受请求之前获取访问令牌、解析知识空间节点并同步快照，返回是否成功
+
+    预加载（gunicorn preload_app）时只在主进程执行一次，fork 出的 worker 直接继承这些缓存。
+    主进程只同步快照，不启动任何后台线程：相关文章和批量渲染在 fork 之后由每个 worker
+    在后台启动，图片缩略图在首次请求对应宽度时生成。gunicorn 因此不必等待这些任务就能开始监听，
+    fork 时也没有可能持有锁的线程。
+    """
+    global _defer_derived
+    start = time.time()
+    token = get_feishu_token()
+    if not token:
+        app.logger.error("预热失败：无法获取飞书访问令牌，将在首个请求时重试")
+        return False
+    _, error = resolve_app_token(token, app.config['FEISHU_BASE_ID'])
     if error:
-        app.logger.error(f"获取文章数据失败：{error}")
-        return render_template('error.html', error=error), 500
-    
-    # 查找匹配 record_id 的文章
-    article = next((r for r in records if r.get('record_id') == record_id), None)
+        app.logger.error(f"预热失败：{error}")
+        return False
+    _defer_derived = True
+    try:
+        snapshot, error = get_snapshot()
+    finally:
+        _defer_derived = False
+    if snapshot is None:
+        app.logger.error(f"预热失败：{error}")
+        return False
+    app.logger.info(f"预热完成 - 记录数: {len(snapshot)}, 耗时: {time.time() - start:.2f}s")
+    return True
+
+def _after_fork_in_child():
+    """子进程不继承线程：重建线程池，替换可能被父进程线程持有的锁，并启动预热时推迟的派生任务"""
+    global _background_executor, _snapshot_lock, _sync_lock, _sync_in_progress, _cold_sync_lock
+    _background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshot-derived')
+    _snapshot_lock = threading.Lock()
+    _sync_lock = threading.Lock()
+    _sync_in_progress = threading.Event()
+    _cold_sync_lock = threading.Lock()
+    _start_deferred_derived()
+
+def _start_deferred_derived():
+    """启动预热时推迟的派生任务；没有 fork 的部署（未启用 preload_app）由首个请求启动"""
+    global _deferred_derived
+    with _cold_sync_lock:
+        deferred, _deferred_derived = _deferred_derived, None
+    if deferred is not None:
+        _start_derived(*deferred)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def _encoded_response(variants, status=200, mimetype='text/html'):
+    """按 Accept-Encoding 返回预压缩的版本，并设置 Vary 以免缓存混用不同编码"""
+    encoding = negotiate(request.headers.get('Accept-Encoding'), variants)
+    response = Response(variants[encoding], status=status, mimetype=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    if len(variants) > 1:
+        response.vary.add('Accept-Encoding')
+    return response
+
+def _page_response(page, state):
+    """将缓存页面包装为响应，并通过 Cache-Control 告知 CDN 剩余的再生成时间"""
+    _record_lookup('page', state)
+    note('cache', state)
+    response = _encoded_response(page.variants, status=page.status)
+    remaining = max(0, int(page.revalidate_at - time.time()))
+    response.headers['Cache-Control'] = f"public, s-maxage={remaining}, stale-while-revalidate={Config.PAGE_REVALIDATE_SECONDS}"
+    response.headers['X-Cache'] = state.upper()
+    return response
+
+def _render_card(summary):
+    template = app.jinja_env.get_template('_article_card.html')
+    return Markup(template.render(article=dict(summary, content=summary['preview_html'])))
+
+def _render_cards(record_ids):
+    """返回文章卡片HTML片段列表；每张卡片按记录修订号缓存，页面只需拼接片段"""
+    snapshot, index = _published
+    cards = []
+    for record_id in record_ids:
+        summary = index.summaries.get(record_id)
+        if summary is None:
+            continue
+        try:
+            cards.append(card_cache.get(record_id, snapshot.revisions[record_id], lambda: _render_card(summary)))
+        except Exception as e:
+            app.logger.error(f"渲染文章卡片 {record_id} 时出错: {str(e)}")
+    return cards
+
+def _index_page_count(snapshot):
+    return max(1, -(-len(snapshot) // Config.INDEX_PAGE_SIZE))
+
+@RENDER_SECONDS.timed('index')
+def _render_index(page=1, sort='latest'):
+    """渲染首页的第 page 页，返回 (HTML, 状态码)；只处理本页的记录"""
+    snapshot = _snapshot
+    total_pages = _index_page_count(snapshot) if snapshot else 1
+    if page > total_pages:
+        return render_template('error.html', error="页码超出范围"), 404
+
+    start = (page - 1) * Config.INDEX_PAGE_SIZE
+    if not snapshot:
+        records = []
+    elif sort == 'hot':
+        # 按时间衰减的阅读热度排序
+        ranked = view_counter.rank(snapshot.by_id)
+        records = [snapshot.by_id[record_id] for record_id in ranked[start:start + Config.INDEX_PAGE_SIZE]]
+    else:
+        records = snapshot.records[start:start + Config.INDEX_PAGE_SIZE]
+    cards = _render_cards([record.get('record_id') for record in records])
+    app.logger.info(f"成功处理 {len(cards)} 篇文章")
+    pagination = {
+        'page': page,
+        'total_pages': total_pages,
+        'prev_page': page - 1 if page > 1 else None,
+        'next_page': page + 1 if page < total_pages else None
+    }
+    with phase('template'):
+        return render_template('index.html', cards=cards, pagination=pagination, sort=sort), 200
+
+@RENDER_SECONDS.timed('article')
+def _render_article(record_id):
+    """渲染文章详情页，返回 (HTML, 状态码)"""
+    snapshot, index = _published
+    article = snapshot.get(record_id) if snapshot else None
 
     if not article:
         error = "文章不存在"
@@ -473,9 +931,7 @@ def article(record_id):
 
     try:
         fields = get_article_fields(article)
-        raw_content = fields.get('概要内容输出', '')
-        app.logger.debug(f"处理文章 {record_id} 的 raw_content 数据类型: {type(raw_content)}")
-        full_content = process_article_content(raw_content, is_preview=False)
+        full_content = _cached_content(article)
         app.logger.debug(f"处理文章 {record_id} 的 full_content 数据类型: {type(full_content)}")
 
         title_content = _convert_to_string(fields.get('标题', '无标题'))
@@ -489,39 +945,378 @@ def article(record_id):
             'title': clean(title_content, strip=True),
             'quote': clean(quote_content, strip=True),
             'comment': clean(comment_content, strip=True),
-            'content': Markup(full_content)  # 使用 Markup 标记为安全HTML
+            'content': Markup(full_content),  # 使用 Markup 标记为安全HTML
+            'related': [index.summaries[related_id]
+                        for related_id in _related.get(record_id, [])
+                        if related_id in index.summaries],
+            'also_read': [index.summaries[other_id]
+                          for other_id in _coviews.get(record_id, [])
+                          if other_id in index.summaries]
         }
 
-        raw_external_link = fields.get('链接', '')
-        processed_external_link = None
-
-        if isinstance(raw_external_link, dict):
-            # Assuming the dictionary contains a 'url' key for the actual link
-            processed_external_link = raw_external_link.get('url')
-        elif isinstance(raw_external_link, str):
-            processed_external_link = raw_external_link
+        processed_external_link = _extract_external_link(fields)
 
         if processed_external_link:
+            fetch_start = time.perf_counter()
+            outcome = 'error'
             try:
                 app.logger.info(f"尝试获取外部链接内容: {processed_external_link}")
-                response = requests.get(processed_external_link, timeout=Config.REQUEST_TIMEOUT)
+                with phase('external'):
+                    response = requests.get(processed_external_link, timeout=Config.REQUEST_TIMEOUT)
                 response.raise_for_status()  # 检查HTTP错误
+                outcome = 'ok'
                 article_data['external_html'] = Markup(response.text)  # 将外部HTML内容标记为安全HTML
                 app.logger.info(f"成功获取外部链接内容: {processed_external_link}")
                 article_data['content'] = Markup(response.text)  # 如果成功获取外部HTML，则将其设置为主要内容
             except requests.exceptions.RequestException as e:
                 app.logger.error(f"获取外部链接内容失败: {processed_external_link} - {str(e)}")
                 article_data['external_html'] = Markup(f"<p>无法加载外部内容: {str(e)}</p>")
+            finally:
+                EXTERNAL_FETCH_SECONDS.observe(time.perf_counter() - fetch_start, outcome)
 
-        return render_template('detail.html', article=article_data)
+        with phase('template'):
+            return render_template('detail.html', article=article_data), 200
     except Exception as e:
         error_msg = f"处理文章 {record_id} 时出错: {str(e)}"
         app.logger.error(error_msg)
         return render_template('error.html', error=error_msg), 500
+
+@app.before_request
+def _start_timer():
+    g.request_timer, g.request_timer_token = start_request()
+
+@app.after_request
+def _record_latency(response):
+    timer = g.get('request_timer')
+    if timer is None:
+        return response
+    total = timer.elapsed()
+    # 按路由规则（而不是实际路径）分组，避免 record_id 造成标签数量无限增长
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_REQUEST_SECONDS.observe(total, route, request.method, str(response.status_code))
+    if Config.SERVER_TIMING:
+        response.headers['Server-Timing'] = timer.header(total)
+    if Config.SLOW_REQUEST_MS and total * 1000 >= Config.SLOW_REQUEST_MS:
+        slow_logger.warning(f"慢请求: {request.method} {request.full_path.rstrip('?')} {response.status_code} - {timer.header(total)}")
+    if access_log.sampled(response.status_code):
+        _log_access(timer, route, response, total)
+    return response
+
+def _log_access(timer, route, response, total):
+    upstream = any(name.startswith('feishu_') or name in ('external', 'snapshot_sync') for name in timer.phases)
+    served_by = next((layer for layer in _SERVING_LAYERS if timer.lookups.get(layer) in ('hit', 'stale')), None)
+    access_log.log({
+        'method': request.method,
+        'route': route,
+        'path': request.path,
+        'record_id': (request.view_args or {}).get('record_id'),
+        'status': response.status_code,
+        'bytes': response.content_length,
+        'ms': round(total * 1000, 2),
+        'phases': {name: round(seconds * 1000, 2) for name, seconds in timer.phases.items()},
+        'cache': timer.lookups,
+        'served_by': served_by or ('upstream' if upstream else 'render'),
+        'upstream': upstream,
+        'ip': request.remote_addr,
+        'ua': request.user_agent.string,
+    })
+
+@app.teardown_request
+def _finish_timer(exc):
+    token = g.pop('request_timer_token', None)
+    if token is not None:
+        finish_request(token)
+
+# 请求分析：未配置时不注册钩子，请求路径上没有任何额外开销
+request_profiler = RequestProfiler(
+    Config.PROFILE_DIR,
+    secret=Config.PROFILE_SECRET,
+    sample_rate=Config.PROFILE_SAMPLE_RATE,
+    max_files=Config.PROFILE_MAX_FILES
+)
+
+if request_profiler.enabled:
+    @app.before_request
+    def _start_profile():
+        token = request.headers.get('X-Profile') or request.args.get('_profile')
+        if request_profiler.should_profile(token):
+            g.profile = request_profiler.start()
+
+    @app.teardown_request
+    def _finish_profile(exc):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            try:
+                filename = request_profiler.finish(profile, f"{request.method}-{route}")
+                app.logger.info(f"请求分析已保存: {filename} ({request.method} {request.path})")
+            except OSError as e:
+                app.logger.error(f"保存请求分析失败: {str(e)}")
+
+@app.route('/assets/<filename>')
+def asset(filename):
+    entry = assets.get(filename)
+    if entry is None:
+        return Response('Not Found', status=404, mimetype='text/plain')
+
+    variants, mimetype, digest = entry
+    response = _encoded_response(variants, mimetype=mimetype)
+    # 文件名包含内容哈希，内容变化时URL随之变化，因此可以永久缓存
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    # 不同编码的字节不同，ETag 也需区分
+    encoding = response.headers.get('Content-Encoding')
+    response.set_etag(f"{digest}-{encoding}" if encoding else digest)
+    return response.make_conditional(request)
+
+@app.route('/media/<file_token>')
+def media(file_token):
+    if not is_valid_token(file_token):
+        return Response('Not Found', status=404, mimetype='text/plain')
+    # 只代理文章中引用的图片，避免借应用的访问令牌读取任意素材或写满缓存目录
+    if _snapshot is None:
+        get_snapshot()
+    if file_token not in _media_tokens:
+        return Response('Not Found', status=404, mimetype='text/plain')
+
+    # 首次访问时用缓存的令牌从飞书下载，之后直接从本地磁盘缓存读取
+    entry, error = media_cache.get_or_fetch(file_token, download_feishu_media)
+    if entry is None:
+        app.logger.error(f"获取素材 {file_token} 失败：{error}")
+        return Response('Bad Gateway', status=502, mimetype='text/plain')
+
+    # ?w= 请求缩略图：已生成则返回对应版本；原图不比请求的宽度大或无法缩放时返回原图
+    max_age, immutable = 31536000, True
+    width = request.args.get('w', type=int)
+    if width in image_derivatives.widths:
+        if width in entry.get('variants', ()):
+            variant = media_cache.lookup(variant_token(file_token, width))
+            if variant is not None:
+                entry = variant
+        elif 'variants' not in entry:
+            # 尚未处理（例如同步前渲染的页面），先返回原图并短时间缓存，同时排队生成
+            image_derivatives.submit([file_token])
+            max_age, immutable = 300, False
+
+    # send_file 负责 ETag、If-None-Match 和 Range 请求
+    response = send_file(entry['path'], mimetype=entry['mimetype'], conditional=True,
+                         etag=entry['sha256'], max_age=max_age)
+    response.cache_control.public = True
+    response.cache_control.immutable = immutable
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Content-Security-Policy'] = "default-src 'none'; sandbox"
+    return response
+
+@app.route('/')
+def index():
+    app.logger.info("进入 index 路由")
+    snapshot, error = get_snapshot()
+    
+    # 如果无法获得快照，返回错误信息
+    if snapshot is None:
+        app.logger.error(f"获取文章列表失败：{error}")
+        return render_template('error.html', error=error), 500
+
+    # 每页只渲染 INDEX_PAGE_SIZE 张卡片，页码超出范围的请求不进入缓存
+    page_number = max(1, request.args.get('page', 1, type=int))
+    if page_number > _index_page_count(snapshot):
+        return render_template('error.html', error="页码超出范围"), 404
+    sort = 'hot' if request.args.get('sort') == 'hot' else 'latest'
+
+    page, state = page_cache.get(f'index:{page_number}:{sort}', lambda: _render_index(page_number, sort))
+    return _page_response(page, state)
+
+@app.route('/article/<record_id>')
+def article(record_id):
+    app.logger.info(f"进入 article 路由，record_id: {record_id}")
+    snapshot, error = get_snapshot()
+    
+    # 如果获取数据失败，返回错误信息
+    if snapshot is None:
+        app.logger.error(f"获取文章数据失败：{error}")
+        return render_template('error.html', error=error), 500
+
+    # 不存在的文章不进入页面缓存，避免任意 record_id 撑大缓存
+    if snapshot.get(record_id) is None:
+        app.logger.error(f"未找到 record_id 为 {record_id} 的文章")
+        return render_template('error.html', error="文章不存在"), 404
+
+    # 请求路径上只做一次内存计数，写库由后台线程批量完成
+    view_counter.increment(record_id)
+    page, state = page_cache.get(f'article:{record_id}', lambda: _render_article(record_id))
+    return _page_response(page, state)
     
 
 
 
+@app.route('/search')
+def search():
+    query = request.args.get('q', '').strip()[:100]
+    app.logger.info(f"进入 search 路由，q: {query}")
+    snapshot, error = get_snapshot()
+    if snapshot is None:
+        app.logger.error(f"搜索失败：{error}")
+        return render_template('error.html', error=error), 500
+
+    cards = []
+    if query:
+        results = search_index.search(query, limit=Config.SEARCH_MAX_RESULTS)
+        cards = _render_cards([record_id for record_id, _ in results])
+
+    return render_template('search.html', query=query, cards=cards)
+
+_feed_cache = {'version': None, 'variants': None, 'etag': None, 'updated': 0}
+_feed_lock = threading.Lock()
+
+def _build_feed(snapshot, index):
+    """每个快照版本只生成一次 feed；单篇 entry 片段按记录修订号缓存"""
+    site_url = Config.SITE_URL.rstrip('/')
+    record_ids = sorted(index.summaries, key=lambda record_id: -snapshot.modified[record_id])[:Config.FEED_ENTRY_LIMIT]
+
+    entries = []
+    for record_id in record_ids:
+        record = snapshot.get(record_id)
+        entries.append(feed_entry_cache.get(
+            record_id,
+            snapshot.revisions[record_id],
+            lambda: build_entry(index.summaries[record_id], _cached_content(record), snapshot.modified[record_id], site_url)
+        ))
+
+    updated = max((snapshot.modified[record_id] for record_id in record_ids), default=snapshot.built_at)
+    body = build_feed(entries, '好文推荐', site_url, updated, Config.FEED_AUTHOR).encode('utf-8')
+    return {
+        'version': snapshot.version,
+        'variants': compress_variants(body, Config.COMPRESSION_LEVEL, Config.COMPRESSION_MIN_SIZE),
+        'etag': hashlib.sha1(body).hexdigest(),
+        'updated': updated
+    }
+
+@app.route('/feed.xml')
+def feed():
+    global _feed_cache
+    # 链接必须是绝对地址，但不能取请求的 Host 头：生成结果按快照版本缓存，第一个请求的 Host 会发给所有读者
+    if not Config.SITE_URL:
+        return Response('Not Found', status=404, mimetype='text/plain')
+    snapshot, error = get_snapshot()
+    if snapshot is None:
+        app.logger.error(f"生成 feed 失败：{error}")
+        return Response('Service Unavailable', status=503, mimetype='text/plain')
+    # get_snapshot 返回后可能又有新快照发布，快照和索引从同一个元组中取，保证版本一致
+    snapshot, index = _published
+
+    cached = _feed_cache
+    if cached['version'] != snapshot.version:
+        with _feed_lock:
+            if _feed_cache['version'] != snapshot.version:
+                _feed_cache = _build_feed(snapshot, index)
+                app.logger.info(f"feed 已重新生成 - 快照版本: {snapshot.version}")
+            cached = _feed_cache
+
+    response = _encoded_response(cached['variants'], mimetype='application/atom+xml')
+    encoding = response.headers.get('Content-Encoding')
+    response.set_etag(f"{cached['etag']}-{encoding}" if encoding else cached['etag'])
+    response.last_modified = cached['updated']
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    return response.make_conditional(request)
+
+sitemaps = Sitemaps(
+    shard_size=Config.SITEMAP_SHARD_SIZE,
+    compress=lambda body: compress_variants(body, Config.COMPRESSION_LEVEL, Config.COMPRESSION_MIN_SIZE)
+)
+
+def _xml_response(variants, digest, last_modified):
+    response = _encoded_response(variants, mimetype='application/xml')
+    encoding = response.headers.get('Content-Encoding')
+    response.set_etag(f"{digest}-{encoding}" if encoding else digest)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response.make_conditional(request)
+
+def _refresh_sitemaps():
+    """返回 HTTP 状态码；与 feed 一样只使用 SITE_URL，不取请求的 Host 头，以免缓存的分片被写入任意域名"""
+    if not Config.SITE_URL:
+        return 404
+    snapshot, error = get_snapshot()
+    if snapshot is None:
+        app.logger.error(f"生成 sitemap 失败：{error}")
+        return 503
+    rebuilt = sitemaps.refresh(snapshot, Config.SITE_URL.rstrip('/'))
+    if rebuilt:
+        app.logger.info(f"sitemap 已更新 - 重新生成分片: {rebuilt}/{len(sitemaps.shards)}")
+    return 200
+
+def _status_response(status):
+    message = 'Not Found' if status == 404 else 'Service Unavailable'
+    return Response(message, status=status, mimetype='text/plain')
+
+@app.route('/sitemap.xml')
+def sitemap_index():
+    status = _refresh_sitemaps()
+    if status != 200:
+        return _status_response(status)
+    return _xml_response(sitemaps.index, sitemaps.index_digest, sitemaps.index_lastmod)
+
+@app.route('/sitemap-<int:number>.xml')
+def sitemap_shard(number):
+    status = _refresh_sitemaps()
+    if status != 200:
+        return _status_response(status)
+    shards = sitemaps.shards
+    if not 1 <= number <= len(shards):
+        return Response('Not Found', status=404, mimetype='text/plain')
+    shard = shards[number - 1]
+    return _xml_response(shard.body, shard.digest, shard.lastmod)
+
+@app.route('/robots.txt')
+def robots():
+    body = "User-agent: *\nAllow: /\n"
+    if Config.SITE_URL:
+        body += f"Sitemap: {Config.SITE_URL.rstrip('/')}/sitemap.xml\n"
+    return Response(body, mimetype='text/plain')
+
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.expose(), content_type=METRICS_CONTENT_TYPE)
+
+def _api_response(body):
+    """返回JSON响应，ETag 由响应内容计算，客户端可用 If-None-Match 获得 304"""
+    response = Response(body, mimetype='application/json')
+    response.headers['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    response.add_etag()
+    return response.make_conditional(request)
+
+def _api_error(error):
+    return jsonify({'error': error.message}), error.status
+
+def _get_article_index():
+    snapshot, error = get_snapshot()
+    if snapshot is None:
+        raise APIError(error or "快照不可用", status=503)
+    return _published[1]
+
+@app.route('/api/articles')
+def api_articles():
+    try:
+        index = _get_article_index()
+        limit = min(max(1, request.args.get('limit', Config.API_PAGE_SIZE, type=int)), Config.API_MAX_PAGE_SIZE)
+        fields = parse_fields(request.args.get('fields'), LIST_FIELDS)
+        body = index.page(request.args.get('cursor'), limit, fields)
+    except APIError as e:
+        return _api_error(e)
+    return _api_response(body)
+
+@app.route('/api/articles/<record_id>')
+def api_article(record_id):
+    try:
+        index = _get_article_index()
+        fields = parse_fields(request.args.get('fields'), DETAIL_FIELDS)
+        body = index.detail(record_id, fields)
+    except APIError as e:
+        return _api_error(e)
+    return _api_response(body)
+
+
 if __name__ == '__main__':
-    # 使用配置文件中的调试模式设置
+    # Flask 开发服务器，仅用于本地调试；生产环境使用 gunicorn -c gunicorn.conf.py wsgi:app
+    # 以脚本运行时 spawn 子进程会把本文件作为 __mp_main__ 重新执行一遍初始化，批量渲染改为在进程内进行
+    Config.RENDER_WORKERS = 1
     app.run(host='0.0.0.0', port=8082, debug=False)
\ No newline at end of file
@@ -0,0 +1,91 @@
+import hashlib
+import mimetypes
+import os
+import re
+
+from compression import compress_variants
+
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCT_RE = re.compile(r'\s*([{};:,>])\s*')
+
+
+def minify_css(text):
+    """去掉注释和多余空白，压缩CSS体积"""
+    text = _CSS_COMMENT_RE.sub('', text)
+    text = _CSS_SPACE_RE.sub(' ', text)
+    text = _CSS_PUNCT_RE.sub(r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+_MINIFIERS = {
+    '.css': minify_css,
+}
+
+
+class AssetManifest:
+    """静态资源清单：压缩源文件并按内容哈希生成文件名
+
+    源文件 css/base.css 会发布为 base.<hash>.css，内容不变则URL不变，
+    因此可以使用 immutable 长期缓存。
+    """
+
+    def __init__(self, source_dir, url_prefix='/assets', compress=compress_variants):
+        self.source_dir = source_dir
+        self._compress = compress
+        self.url_prefix = url_prefix.rstrip('/')
+        self._urls = {}
+        self._files = {}
+        self.build()
+
+    def build(self):
+        urls = {}
+        files = {}
+        for root, dirnames, filenames in os.walk(self.source_dir):
+            # dist 目录是 write() 的输出，不作为源文件
+            dirnames[:] = [d for d in dirnames if d != 'dist']
+            for filename in sorted(filenames):
+                path = os.path.join(root, filename)
+                logical = os.path.relpath(path, self.source_dir).replace(os.sep, '/')
+                stem, ext = os.path.splitext(filename)
+
+                with open(path, 'rb') as f:
+                    data = f.read()
+                minify = _MINIFIERS.get(ext)
+                if minify is not None:
+                    data = minify(data.decode('utf-8')).encode('utf-8')
+
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                hashed_name = f"{stem}.{digest}{ext}"
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                urls[logical] = f"{self.url_prefix}/{hashed_name}"
+                files[hashed_name] = (self._compress(data), mimetype, digest)
+
+        self._urls = urls
+        self._files = files
+
+    def url(self, logical_path):
+        """模板辅助函数：返回带内容哈希的资源URL"""
+        try:
+            return self._urls[logical_path]
+        except KeyError:
+            raise KeyError(f"未知的静态资源: {logical_path}")
+
+    def get(self, hashed_name):
+        """返回 ({编码: 内容}, MIME类型, 哈希)，不存在时返回 None"""
+        return self._files.get(hashed_name)
+
+    def write(self, out_dir):
+        """将压缩后的资源写入目录，便于交给CDN或静态托管"""
+        os.makedirs(out_dir, exist_ok=True)
+        for hashed_name, (variants, _, _) in self._files.items():
+            with open(os.path.join(out_dir, hashed_name), 'wb') as f:
+                f.write(variants['identity'])
+        return sorted(self._files)
+
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    manifest = AssetManifest(os.path.join(base_dir, 'static'))
+    for name in manifest.write(os.path.join(base_dir, 'static', 'dist')):
+        print(name)
@@ -0,0 +1,48 @@
+"""测量进程池批量渲染随进程数的扩展情况
+
+运行：python -m benchmarks.bench_bulk_render [文章数]
+"""
+import os
+import random
+import sys
+import time
+
+from bulk_render import MARKDOWN, RICHTEXT, bulk_render, render_serial
+
+_WORDS = ['深度工作', '注意力', '信息过载', '长期主义', '复利', '认知偏差', '第一性原理', '写作', '阅读', '习惯']
+
+
+def _jobs(count, rng):
+    jobs = []
+    for i in range(count):
+        paragraphs = ['，'.join(rng.choice(_WORDS) for _ in range(40)) + '。' for _ in range(8)]
+        if i % 2:
+            segments = [{'type': 'paragraph', 'children': [{'type': 'text', 'text': p, 'bold': rng.random() < 0.2}]}
+                        for p in paragraphs]
+            jobs.append((RICHTEXT, segments))
+        else:
+            body = '\n\n'.join(f"## 第{n}节\n\n- **要点**：{p}" for n, p in enumerate(paragraphs))
+            jobs.append((MARKDOWN, body))
+    return jobs
+
+
+def main(count=2000):
+    jobs = _jobs(count, random.Random(42))
+
+    start = time.perf_counter()
+    expected = render_serial(jobs)
+    serial = time.perf_counter() - start
+    print(f"{count} 篇文章，单进程：{serial:.2f} s")
+
+    cores = os.cpu_count() or 1
+    workers = sorted({1, 2, 4, cores} | ({cores // 2} if cores > 4 else set()))
+    for n in workers:
+        start = time.perf_counter()
+        results = bulk_render(jobs, workers=n)
+        elapsed = time.perf_counter() - start
+        assert results == expected, '结果顺序或内容与单进程渲染不一致'
+        print(f"{n:>3} 进程：{elapsed:.2f} s，加速比 {serial / elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:2]])
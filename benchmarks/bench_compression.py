@@ -0,0 +1,76 @@
+"""比较逐请求压缩与预压缩缓存的传输字节数和每请求CPU时间
+
+运行：python -m benchmarks.bench_compression [文章数] [请求数]
+"""
+import gzip
+import random
+import sys
+import time
+
+import app as blog
+from compression import compress_variants, negotiate
+
+
+_PHRASES = ['深度工作', '注意力', '信息过载', '长期主义', '复利', '认知偏差', '第一性原理',
+            '写作', '阅读', '习惯', '组织管理', '神经科学', '产品思维', '用户体验']
+
+
+def _synthetic_records(count):
+    rng = random.Random(42)
+    records = []
+    for i in range(count):
+        body = '。'.join('、'.join(rng.sample(_PHRASES, 4)) for _ in range(12))
+        records.append({
+            'record_id': f'rec{i:06d}',
+            'fields': {
+                '标题': f'第{i}篇：如何在信息过载的时代保持专注',
+                '金句输出': '真正的专注不是拒绝一切，而是清楚地知道自己要什么。',
+                '黄叔点评': '这篇文章把注意力管理讲得很透，值得反复读。',
+                '概要内容输出': f'## 核心观点\n\n{body}。',
+            },
+        })
+    return records
+
+
+def _render_index_page(count):
+    records = _synthetic_records(count)
+    blog.get_table_records = lambda: (records, None)
+    blog.sync_snapshot()
+    with blog.app.test_request_context('/'):
+        body, _ = blog._render_index()
+    return body.encode('utf-8')
+
+
+def _cpu_per_request(func, requests):
+    start = time.process_time()
+    for _ in range(requests):
+        func()
+    return (time.process_time() - start) / requests * 1e6
+
+
+def main(count=100, requests=500):
+    body = _render_index_page(count)
+    accept = 'gzip, deflate, br'
+
+    build_start = time.process_time()
+    variants = compress_variants(body)
+    build_us = (time.process_time() - build_start) * 1e6
+
+    cases = [
+        ('identity（不压缩）', len(body), _cpu_per_request(lambda: negotiate(None, variants), requests)),
+        ('逐请求 gzip', len(gzip.compress(body, compresslevel=6)),
+         _cpu_per_request(lambda: gzip.compress(body, compresslevel=6), requests)),
+        ('预压缩缓存', len(variants[negotiate(accept, variants)]),
+         _cpu_per_request(lambda: variants[negotiate(accept, variants)], requests)),
+    ]
+
+    print(f"页面：{count} 篇文章，原始大小 {len(body)} 字节；可用编码 {sorted(variants)}")
+    print(f"放入缓存时一次性压缩耗时：{build_us:.0f} µs")
+    print(f"{'方式':<16}{'传输字节':>12}{'每请求CPU(µs)':>18}")
+    for name, size, cpu in cases:
+        print(f"{name:<16}{size:>12}{cpu:>18.1f}")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
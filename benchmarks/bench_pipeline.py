@@ -0,0 +1,147 @@
+"""内容处理流水线基准：字段转换、Markdown 渲染以及首页/详情页的完整渲染
+
+飞书接口由 benchmarks.stub_feishu 在进程内替代，或用 --replay 回放录制的真实响应
+（见 feishu_fixtures.py），都不访问网络。结果写为 JSON，可用 benchmarks.compare 对比两次运行。
+
+运行：python -m benchmarks.bench_pipeline [--count 500] [--seed 42] [--replay 录制文件] [--output 文件]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import app as blog
+from benchmarks import corpus
+from benchmarks.stub_feishu import StubFeishu
+from config import Config
+from feishu_fixtures import Replayer
+
+
+def measure(func, args_list, repeat=1):
+    """依次以 args_list 中的参数调用 func，返回每次调用耗时（微秒）的统计"""
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            func(*args)
+            samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        'n': len(samples),
+        'mean_us': round(sum(samples) / len(samples), 2),
+        'p50_us': round(samples[len(samples) // 2], 2),
+        'p95_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        'min_us': round(samples[0], 2),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_converters(rng, results, samples=200):
+    for shape in corpus.SHAPES:
+        short = [(corpus.field_value(shape, rng),) for _ in range(samples)]
+        long = [(corpus.field_value(shape, rng, long=True),) for _ in range(samples // 4)]
+        results[f'convert_to_string[{shape}]'] = measure(blog._convert_to_string, short)
+        results[f'convert_to_string[{shape},long]'] = measure(blog._convert_to_string, long)
+        results[f'process_article_content[{shape},preview]'] = measure(
+            lambda content: blog.process_article_content(content, is_preview=True), long)
+        results[f'process_article_content[{shape},full]'] = measure(
+            lambda content: blog.process_article_content(content, is_preview=False), long)
+
+    segments = [(corpus.richtext_segments(rng, paragraphs=8),) for _ in range(samples)]
+    results['convert_feishu_richtext_to_html[segments]'] = measure(blog._convert_feishu_richtext_to_html, segments)
+    results['convert_feishu_richtext_to_html[json]'] = measure(
+        blog._convert_feishu_richtext_to_html, [(json.dumps(args[0], ensure_ascii=False),) for args in segments])
+
+
+def _wait_for_background():
+    # 等待同步提交的后台任务（相关文章等）完成，避免与计时争抢CPU
+    blog._background_executor.submit(lambda: None).result()
+
+
+def bench_pages(transport, results, samples=50):
+    client = blog.app.test_client()
+
+    with transport:
+        blog.feishu_token_cache.update(token=None, expire_time=0)
+        start = time.perf_counter()
+        blog.sync_snapshot()
+        results['sync_snapshot'] = {'n': 1, 'mean_us': round((time.perf_counter() - start) * 1e6, 2)}
+        _wait_for_background()
+        record_ids = list(blog._snapshot.by_id)
+
+        def cold_index():
+            for key in blog.page_cache.keys():
+                blog.page_cache.discard(key)
+            blog.card_cache.clear()
+            assert client.get('/').status_code == 200
+
+        def cold_article(record_id):
+            blog.page_cache.discard(f'article:{record_id}')
+            blog.content_cache.clear()
+            assert client.get(f'/article/{record_id}').status_code == 200
+
+        def cached(path):
+            assert client.get(path).status_code == 200
+
+        sample_ids = record_ids[:samples]
+        results['index[cold]'] = measure(cold_index, [()] * max(5, samples // 5))
+        results['index[cached]'] = measure(cached, [('/',)] * samples)
+        results['article[cold]'] = measure(cold_article, [(record_id,) for record_id in sample_ids])
+        results['article[cached]'] = measure(cached, [(f'/article/{record_id}',) for record_id in sample_ids])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='内容处理流水线基准')
+    parser.add_argument('--count', type=int, default=500, help='合成文章数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--replay', help='回放录制的飞书响应，代替合成语料')
+    parser.add_argument('--output', help='结果 JSON 路径，默认写入 data/bench/')
+    args = parser.parse_args(argv)
+
+    # 基准过程中不启用进程池预渲染，保证每次测量的条件一致
+    Config.BULK_RENDER_THRESHOLD = sys.maxsize
+    blog.app.config.update(FEISHU_TABLE_ID=blog.app.config.get('FEISHU_TABLE_ID') or 'tblBench')
+    blog.app.logger.setLevel('ERROR')
+
+    results = {}
+    bench_converters(random.Random(args.seed), results)
+    if args.replay:
+        transport = Replayer(args.replay, Config.FEISHU_API_BASE_URL, speed=0)
+    else:
+        transport = StubFeishu(corpus.make_records(args.count, seed=args.seed))
+    bench_pages(transport, results)
+
+    report = {
+        'benchmark': 'pipeline',
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'count': args.count, 'seed': args.seed, 'replay': args.replay},
+        'results': results,
+    }
+    output = args.output or os.path.join('data', 'bench', f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    width = max(len(name) for name in results)
+    for name, stats in results.items():
+        print(f"{name:<{width}}  p50 {stats.get('p50_us', stats['mean_us']):>10.1f} us  mean {stats['mean_us']:>10.1f} us")
+    print(f"结果已写入 {output}")
+    return report
+
+
+if __name__ == '__main__':
+    main()
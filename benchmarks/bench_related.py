@@ -0,0 +1,47 @@
+"""测量相关文章近邻计算在不同文章规模下的耗时和内存
+
+运行：python -m benchmarks.bench_related [文章数 ...]，默认 1000 10000 50000
+"""
+import random
+import sys
+import time
+
+from related import build_tfidf, top_k_neighbours
+
+_VOCAB_RNG = random.Random(7)
+_VOCAB = [''.join(chr(_VOCAB_RNG.randint(0x4e00, 0x4e00 + 3000)) for _ in range(_VOCAB_RNG.randint(2, 4)))
+          for _ in range(5000)]
+
+
+def _texts(count, rng):
+    # 每篇文章围绕少数几个“主题词”展开，使近邻有意义
+    topics = [rng.sample(_VOCAB, 30) for _ in range(50)]
+    texts = []
+    for _ in range(count):
+        topic = rng.choice(topics)
+        words = [rng.choice(topic) if rng.random() < 0.5 else rng.choice(_VOCAB) for _ in range(80)]
+        texts.append('，'.join(words))
+    return texts
+
+
+def main(sizes=(1000, 10000, 50000), k=5, block_size=512):
+    rng = random.Random(42)
+    print(f"{'文章数':>8}{'TF-IDF(s)':>12}{'近邻(s)':>10}{'矩阵(MB)':>10}{'分块(MB)':>10}")
+    for count in sizes:
+        texts = _texts(count, rng)
+
+        start = time.perf_counter()
+        matrix = build_tfidf(texts)
+        tfidf = time.perf_counter() - start
+
+        start = time.perf_counter()
+        top_k_neighbours(matrix, k=k, block_size=block_size)
+        neighbours = time.perf_counter() - start
+
+        block_mb = min(block_size, count) * count * 4 / 1e6
+        print(f"{count:>8}{tfidf:>12.2f}{neighbours:>10.2f}{matrix.nbytes / 1e6:>10.1f}{block_mb:>10.1f}")
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or (1000, 10000, 50000)
+    main(sizes)
@@ -0,0 +1,59 @@
+"""测量检索索引的构建、增量更新和查询耗时
+
+运行：python -m benchmarks.bench_search [文章数] [查询次数]
+"""
+import random
+import sys
+import time
+
+from search import SearchIndex
+
+# 从常用汉字区间随机组成 2~4 字的词表，使词频分布接近真实中文语料
+_VOCAB_RNG = random.Random(7)
+_VOCAB = [''.join(chr(_VOCAB_RNG.randint(0x4e00, 0x4e00 + 3000)) for _ in range(_VOCAB_RNG.randint(2, 4)))
+          for _ in range(5000)]
+
+
+def _documents(count, rng):
+    docs = {}
+    for i in range(count):
+        words = rng.sample(_VOCAB, 6)
+        docs[f'rec{i:06d}'] = {
+            'title': f"{words[0]}与{words[1]}",
+            'quote': f"{words[2]}是{words[3]}的起点",
+            'comment': f"值得一读 {words[4]}",
+            'body': '，'.join(rng.choice(_VOCAB) for _ in range(300)),
+        }
+    return docs
+
+
+def main(count=20000, queries=200):
+    rng = random.Random(42)
+    docs = _documents(count, rng)
+    index = SearchIndex()
+
+    start = time.perf_counter()
+    index.update(docs)
+    build = time.perf_counter() - start
+
+    changed = {record_id: docs[record_id] for record_id in rng.sample(sorted(docs), 100)}
+    start = time.perf_counter()
+    index.update(changed)
+    update = time.perf_counter() - start
+
+    samples = []
+    for _ in range(queries):
+        query = ''.join(rng.sample(_VOCAB, 2))
+        start = time.perf_counter()
+        index.search(query, limit=20)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+
+    print(f"文档数 {count}：构建 {build:.2f} s，增量更新100篇 {update * 1000:.1f} ms")
+    print(f"查询 {queries} 次：p50 {samples[len(samples) // 2] * 1000:.2f} ms，"
+          f"p95 {samples[int(len(samples) * 0.95)] * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
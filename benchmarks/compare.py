@@ -0,0 +1,66 @@
+"""比较两次基准结果，标出变慢超过阈值的项目
+
+支持 bench_pipeline（results 下的 p50_us）和 loadgen（routes 下的 p50_ms/p95_ms/p99_ms）的 JSON。
+存在回归时以状态码 1 退出，可直接用于 CI。
+
+运行：python -m benchmarks.compare 基线.json 新结果.json [--threshold 0.10] [--metric p50]
+"""
+import argparse
+import json
+import sys
+
+
+def _metrics(report, metric):
+    """把两种结果格式统一为 {名称: 数值}，数值越大越慢"""
+    values = {}
+    for name, stats in report.get('results', {}).items():
+        value = stats.get(f'{metric}_us', stats.get('mean_us'))
+        if value is not None:
+            values[name] = value
+    for route, stats in report.get('routes', {}).items():
+        value = stats.get(f'{metric}_ms')
+        if value is not None:
+            values[route] = value
+    return values
+
+
+def compare(base, new, threshold=0.10, metric='p50', noise_floor=1.0):
+    """返回 [(名称, 基线, 新值, 变化比例, 是否回归)]；基线小于 noise_floor 的项目只报告不判定"""
+    base_values, new_values = _metrics(base, metric), _metrics(new, metric)
+    rows = []
+    for name in sorted(set(base_values) & set(new_values)):
+        old, current = base_values[name], new_values[name]
+        change = (current - old) / old if old else 0.0
+        rows.append((name, old, current, change, old >= noise_floor and change > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='比较两次基准结果')
+    parser.add_argument('base', help='基线结果 JSON')
+    parser.add_argument('new', help='新结果 JSON')
+    parser.add_argument('--threshold', type=float, default=0.10, help='判定为回归的变慢比例')
+    parser.add_argument('--metric', default='p50', choices=('p50', 'p95', 'p99', 'mean'))
+    args = parser.parse_args(argv)
+
+    with open(args.base, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    if base.get('params') != new.get('params'):
+        print(f"注意：两次运行的参数不同 {base.get('params')} / {new.get('params')}")
+
+    rows = compare(base, new, args.threshold, args.metric)
+    width = max((len(row[0]) for row in rows), default=10)
+    regressions = 0
+    for name, old, current, change, regressed in rows:
+        flag = '回归' if regressed else ('改善' if change < -args.threshold else '')
+        regressions += regressed
+        print(f"{name:<{width}}  {old:>12.2f}  →  {current:>12.2f}  {change:>+8.1%}  {flag}")
+    print(f"{len(rows)} 项，{regressions} 项变慢超过 {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""合成的飞书多维表格语料
+
+字段形态覆盖线上表格中实际出现的几种：
+- 富文本片段列表：[{'type': 'text', 'text': ...}, ...]
+- 序列化为 JSON 字符串的富文本
+- Python repr 形式（单引号）的富文本字符串
+- 较长的 Markdown 正文
+同一 seed 生成的语料完全相同，便于对比不同版本的结果。
+"""
+import json
+import random
+
+_PHRASES = ['深度工作', '注意力', '信息过载', '长期主义', '复利', '认知偏差', '第一性原理', '写作',
+            '阅读', '习惯', '组织管理', '神经科学', '产品思维', '用户体验', 'AI', 'LLM', 'Python']
+
+SEGMENTS = 'segments'
+JSON_STRING = 'json'
+REPR_STRING = 'repr'
+MARKDOWN = 'markdown'
+SHAPES = (SEGMENTS, JSON_STRING, REPR_STRING, MARKDOWN)
+
+
+def _sentence(rng, words=12):
+    return '，'.join(rng.choice(_PHRASES) for _ in range(words)) + '。'
+
+
+def richtext_segments(rng, paragraphs=4):
+    """飞书富文本片段列表，包含加粗、链接和段落"""
+    segments = []
+    for _ in range(paragraphs):
+        children = [{'type': 'text', 'text': _sentence(rng), 'bold': rng.random() < 0.2}]
+        if rng.random() < 0.3:
+            children.append({'type': 'link', 'text': rng.choice(_PHRASES), 'url': 'https://example.com/ref'})
+        segments.append({'type': 'paragraph', 'children': children})
+    return segments
+
+
+def text_segments(rng, count=3):
+    """只含 text 片段的列表，标题、金句等短字段常见的形态"""
+    return [{'type': 'text', 'text': _sentence(rng, words=4)} for _ in range(count)]
+
+
+def markdown_body(rng, sections=8):
+    parts = []
+    for number in range(sections):
+        parts.append(f"## 第{number + 1}节 {rng.choice(_PHRASES)}")
+        parts.append(_sentence(rng, words=30))
+        parts.append('\n'.join(f"- **{rng.choice(_PHRASES)}**：{_sentence(rng, words=8)}" for _ in range(4)))
+        if rng.random() < 0.3:
+            parts.append(f"> {_sentence(rng, words=10)}")
+    return '\n\n'.join(parts)
+
+
+def field_value(shape, rng, long=False):
+    """按形态生成一个字段值；long 为 True 时生成正文长度的内容"""
+    if shape == MARKDOWN:
+        return markdown_body(rng, sections=8 if long else 1)
+    segments = text_segments(rng, count=20 if long else 3)
+    if shape == JSON_STRING:
+        return json.dumps(segments, ensure_ascii=False)
+    if shape == REPR_STRING:
+        return repr(segments)
+    return segments
+
+
+def make_records(count, seed=42, external_link_ratio=0.0, link_base='https://example.com'):
+    """生成 count 条多维表格记录，正文字段轮流使用各种形态；部分记录带有指向 link_base 的外部链接"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        shape = SHAPES[i % len(SHAPES)]
+        fields = {
+            '标题': text_segments(rng, count=1) if i % 3 else f"第{i}篇：{rng.choice(_PHRASES)}",
+            '金句输出': field_value(shape, rng),
+            '黄叔点评': field_value(shape, rng),
+            '概要内容输出': field_value(shape, rng, long=True),
+        }
+        if rng.random() < external_link_ratio:
+            fields['链接'] = {'link': f'{link_base}/post/{i}', 'text': '原文'}
+        records.append({
+            'record_id': f'rec{i:06d}',
+            'last_modified_time': 1700000000000 + i * 60000,
+            'fields': fields,
+        })
+    return records
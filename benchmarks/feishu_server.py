@@ -0,0 +1,160 @@
+"""本地飞书替身服务，用于离线压测
+
+实现访问令牌、知识空间 get_node、多维表格记录列表（page_token 分页）和单条记录接口，
+数据来自 benchmarks.corpus 的合成语料；/post/<n> 作为外部链接的目标页面。
+可以注入延迟分布、限流（HTTP 429 + 飞书限流码）、超时和 5xx 错误。
+
+运行：
+    python -m benchmarks.feishu_server --port 8090 --count 2000 --latency lognormal:40,0.5 --error-rate 0.01
+    FEISHU_API_BASE_URL=http://127.0.0.1:8090/open-apis FEISHU_APP_ID=x FEISHU_APP_SECRET=x \\
+        FEISHU_BASE_ID=x FEISHU_TABLE_ID=x python app.py
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from benchmarks import corpus
+from benchmarks.stub_feishu import StubFeishu
+
+# 飞书“请求频率超限”错误码
+RATE_LIMIT_CODE = 99991400
+
+
+def parse_latency(spec):
+    """解析延迟分布，返回生成毫秒数的函数
+
+    fixed:MS | uniform:MIN,MAX | lognormal:MEDIAN,SIGMA（中位数为 MEDIAN 毫秒）
+    """
+    if not spec:
+        return lambda rng: 0.0
+    kind, _, args = spec.partition(':')
+    values = [float(value) for value in args.split(',') if value]
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'lognormal' and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"无法解析延迟分布：{spec}")
+
+
+class FaultInjector:
+    """按概率决定每个请求是否出错；随机数由固定 seed 生成，多线程共享时加锁"""
+
+    def __init__(self, latency=None, rate_limit=0.0, timeout_rate=0.0, error_rate=0.0, hang_seconds=60.0, seed=1):
+        self.latency = parse_latency(latency)
+        self.rate_limit = rate_limit
+        self.timeout_rate = timeout_rate
+        self.error_rate = error_rate
+        self.hang_seconds = hang_seconds
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def decide(self):
+        """返回 (延迟秒数, 故障类型或 None)"""
+        with self._lock:
+            delay = self.latency(self._rng) / 1000
+            roll = self._rng.random()
+        if roll < self.timeout_rate:
+            return self.hang_seconds, 'timeout'
+        roll -= self.timeout_rate
+        if roll < self.rate_limit:
+            return delay, 'rate_limit'
+        roll -= self.rate_limit
+        if roll < self.error_rate:
+            return delay, 'error'
+        return delay, None
+
+
+def make_handler(stub, faults):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _serve(self, method):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            parts = urlsplit(self.path)
+            is_api = parts.path.startswith('/open-apis/')
+
+            delay, fault = faults.decide() if is_api else (0.0, None)
+            if delay:
+                time.sleep(delay)
+            if fault == 'timeout':
+                # 挂起超过客户端超时后直接断开
+                self.close_connection = True
+                return
+            if fault == 'rate_limit':
+                return self._send(429, {'code': RATE_LIMIT_CODE, 'msg': 'request trigger frequency limit'})
+            if fault == 'error':
+                return self._send(random.choice((500, 502, 503)), {'code': 1, 'msg': 'internal error'})
+
+            response = stub.handle(method, f"http://stub{parts.path}", params=dict(parse_qsl(parts.query)))
+            self._send(response.status_code, body=response.content, content_type=response.headers['Content-Type'])
+
+        def _send(self, status, payload=None, body=None, content_type='application/json'):
+            if body is None:
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._serve('get')
+
+        def do_POST(self):
+            self._serve('post')
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host='127.0.0.1', port=8090, count=2000, seed=42, external_link_ratio=0.0, **fault_options):
+    base = f"http://{host}:{port}"
+    records = corpus.make_records(count, seed=seed, external_link_ratio=external_link_ratio, link_base=base)
+    stub = StubFeishu(records)
+    server = ThreadingHTTPServer((host, port), make_handler(stub, FaultInjector(**fault_options)))
+    server.daemon_threads = True
+    return server, f"{base}/open-apis"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='本地飞书替身服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--count', type=int, default=2000, help='合成记录数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--external-link-ratio', type=float, default=0.0, help='带外部链接（指向本服务 /post/<n>）的记录比例')
+    parser.add_argument('--latency', help='接口延迟分布：fixed:MS、uniform:MIN,MAX 或 lognormal:MEDIAN,SIGMA（毫秒）')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='返回 429 限流的比例')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='挂起不响应的比例')
+    parser.add_argument('--hang-seconds', type=float, default=60.0, help='模拟超时时挂起的秒数')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 5xx 的比例')
+    args = parser.parse_args(argv)
+
+    server, base_url = serve(
+        args.host, args.port, count=args.count, seed=args.seed, external_link_ratio=args.external_link_ratio,
+        latency=args.latency, rate_limit=args.rate_limit, timeout_rate=args.timeout_rate,
+        error_rate=args.error_rate, hang_seconds=args.hang_seconds
+    )
+    print(f"飞书替身服务已启动：FEISHU_API_BASE_URL={base_url}（{args.count} 条记录）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""对运行中的站点发起并发请求，统计吞吐量和 p50/p95/p99 延迟
+
+文章 ID 从站点的 /api/articles 获取，请求按 --article-ratio 在首页和详情页之间分配。
+
+运行：python -m benchmarks.loadgen http://127.0.0.1:8082 --concurrency 16 --duration 30 [--output 文件]
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return None
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+
+def fetch_article_ids(base_url, limit=100):
+    response = requests.get(f"{base_url}/api/articles", params={'limit': limit, 'fields': 'record_id'}, timeout=60)
+    response.raise_for_status()
+    return [item['record_id'] for item in response.json()['items']]
+
+
+def _worker(base_url, article_ids, article_ratio, deadline, seed, results):
+    rng = random.Random(seed)
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        if article_ids and rng.random() < article_ratio:
+            route, path = '/article/<id>', f"/article/{rng.choice(article_ids)}"
+        else:
+            route, path = '/', '/'
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=30)
+            status = response.status_code
+        except requests.exceptions.RequestException:
+            status = 'error'
+        results.append((route, status, time.perf_counter() - start))
+
+
+def run(base_url, concurrency=8, duration=10.0, article_ratio=0.8, seed=1):
+    base_url = base_url.rstrip('/')
+    article_ids = fetch_article_ids(base_url)
+    # 预热首页，避免首次渲染计入统计
+    requests.get(f"{base_url}/", timeout=60)
+
+    results = []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=_worker, args=(base_url, article_ids, article_ratio, deadline, seed + i, results))
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {'base_url': base_url, 'concurrency': concurrency, 'duration_s': round(elapsed, 2), 'routes': {}}
+    for route in ('/', '/article/<id>'):
+        samples = sorted(latency for r, _, latency in results if r == route)
+        errors = sum(1 for r, status, _ in results if r == route and (status == 'error' or status >= 500))
+        report['routes'][route] = {
+            'requests': len(samples),
+            'errors': errors,
+            'rps': round(len(samples) / elapsed, 1),
+            'p50_ms': round(percentile(samples, 0.50) * 1000, 2) if samples else None,
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 2) if samples else None,
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 2) if samples else None,
+        }
+    report['total_rps'] = round(len(results) / elapsed, 1)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='站点压测')
+    parser.add_argument('base_url', help='站点地址，如 http://127.0.0.1:8082')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='持续时间（秒）')
+    parser.add_argument('--article-ratio', type=float, default=0.8, help='详情页请求占比')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='结果 JSON 路径')
+    args = parser.parse_args(argv)
+
+    report = run(args.base_url, args.concurrency, args.duration, args.article_ratio, args.seed)
+    for route, stats in report['routes'].items():
+        print(f"{route:<14} {stats['requests']:>7} 次  {stats['rps']:>8.1f} req/s  错误 {stats['errors']:>4}  "
+              f"p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms")
+    print(f"总吞吐量 {report['total_rps']} req/s（并发 {args.concurrency}，{report['duration_s']} s）")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
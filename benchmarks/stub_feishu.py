@@ -0,0 +1,83 @@
+"""进程内的飞书接口替身：替换 requests.request/requests.get，不访问网络
+
+实现访问令牌、知识空间节点、多维表格记录列表（按 page_token 分页）和单条记录接口；
+其他地址（外部链接）返回一段固定的HTML。用法：
+
+    with StubFeishu(records):
+        blog.sync_snapshot()
+"""
+import json
+import re
+
+import requests
+
+_RECORD_RE = re.compile(r'/bitable/v1/apps/[^/]+/tables/[^/]+/records/([^/?]+)$')
+_RECORDS_RE = re.compile(r'/bitable/v1/apps/[^/]+/tables/[^/]+/records$')
+
+
+class StubResponse:
+    def __init__(self, payload=None, status_code=200, content_type='application/json', body=None):
+        self.status_code = status_code
+        self.headers = {'Content-Type': content_type}
+        self._payload = payload
+        self.content = body if body is not None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.text = self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return self._payload if self._payload is not None else json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class StubFeishu:
+    def __init__(self, records, external_html='<p>外部内容</p>'):
+        self.records = list(records)
+        self.by_id = {record['record_id']: record for record in self.records}
+        self.external_html = external_html
+        self.call_count = 0
+        self._saved = None
+
+    def handle(self, method, url, params=None, **kwargs):
+        path = url.split('?', 1)[0]
+        self.call_count += 1
+        if path.endswith('/auth/v3/tenant_access_token/internal'):
+            return StubResponse({'code': 0, 'msg': 'ok', 'tenant_access_token': 't-stub', 'expire': 7200})
+        if path.endswith('/wiki/v2/spaces/get_node'):
+            return StubResponse({'code': 0, 'data': {'node': {'obj_token': 'bascnStub', 'obj_type': 'bitable'}}})
+        if _RECORDS_RE.search(path):
+            return StubResponse(self._list_records(params or {}))
+        match = _RECORD_RE.search(path)
+        if match:
+            record = self.by_id.get(match.group(1))
+            if record is None:
+                return StubResponse({'code': 1254043, 'msg': 'RecordIdNotFound'})
+            return StubResponse({'code': 0, 'data': {'record': record}})
+        if 'open.feishu.cn' in url or '/open-apis/' in url:
+            return StubResponse({'code': 99991400, 'msg': 'unknown endpoint'}, status_code=404)
+        return StubResponse(content_type='text/html', body=self.external_html.encode('utf-8'))
+
+    def _list_records(self, params):
+        page_size = min(int(params.get('page_size', 20)), 500)
+        offset = int(params.get('page_token') or 0)
+        items = self.records[offset:offset + page_size]
+        has_more = offset + page_size < len(self.records)
+        data = {'items': items, 'total': len(self.records), 'has_more': has_more}
+        if has_more:
+            data['page_token'] = str(offset + page_size)
+        return {'code': 0, 'msg': 'success', 'data': data}
+
+    def __enter__(self):
+        self._saved = (requests.request, requests.get)
+        requests.request = self.handle
+        requests.get = lambda url, **kwargs: self.handle('get', url, **kwargs)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        requests.request, requests.get = self._saved
+        return False
@@ -0,0 +1,60 @@
+"""批量渲染：把 Markdown 和飞书富文本的转换分摊到进程池
+
+转换和 bleach 清理都是纯 CPU 计算，受 GIL 限制无法靠线程并行。这里按块把任务
+提交到进程池，executor.map 保证结果顺序与提交顺序一致。
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from content import markdown_to_html, richtext_to_html
+
+logger = logging.getLogger('app')
+
+MARKDOWN = 'markdown'
+RICHTEXT = 'richtext'
+
+
+def _render_one(kind, payload, image_widths=()):
+    if kind == RICHTEXT:
+        return str(richtext_to_html(payload, image_widths))
+    return str(markdown_to_html(payload)) if payload else ''
+
+
+def _render_chunk(chunk, image_widths=()):
+    """渲染失败的任务返回 None，调用方不应缓存"""
+    results = []
+    for kind, payload in chunk:
+        try:
+            results.append(_render_one(kind, payload, image_widths))
+        except Exception as e:
+            logger.error(f"批量渲染单篇失败: {str(e)}")
+            results.append(None)
+    return results
+
+
+def render_serial(jobs, image_widths=()):
+    """在当前进程内依次渲染，用于小批量任务和基准对照"""
+    return _render_chunk(jobs, image_widths)
+
+
+def bulk_render(jobs, workers=None, chunk_size=32, image_widths=()):
+    """并行渲染 [(类型, 内容), ...]，按提交顺序返回HTML字符串列表，渲染失败的位置为 None
+
+    使用 spawn 启动子进程：应用进程里有后台线程，fork 可能复制到被占用的锁。
+    子进程只导入 content 模块，不会执行 app.py 的初始化。
+    """
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= chunk_size:
+        return render_serial(jobs, image_widths)
+
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as executor:
+        results = []
+        for chunk_result in executor.map(partial(_render_chunk, image_widths=image_widths), chunks):
+            results.extend(chunk_result)
+    return results
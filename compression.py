@@ -0,0 +1,67 @@
+import gzip
+
+try:
+    import brotli  # 可选依赖，未安装时只提供 gzip
+except ImportError:
+    brotli = None
+
+# 按优先级排列的可用编码，协商时优先压缩率更高的编码
+_PREFERRED = ('br', 'gzip', 'identity') if brotli is not None else ('gzip', 'identity')
+
+
+def compress_variants(body, level=9, min_size=512):
+    """预先压缩响应体，返回 {编码: 字节} 字典
+
+    只在放入缓存时压缩一次；太小或压缩后没有变小的内容只保留原始版本。
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+
+    variants = {'identity': body}
+    if len(body) < min_size:
+        return variants
+
+    gzipped = gzip.compress(body, compresslevel=level, mtime=0)
+    if len(gzipped) < len(body):
+        variants['gzip'] = gzipped
+    if brotli is not None:
+        brotlied = brotli.compress(body, quality=11 if level >= 9 else level)
+        if len(brotlied) < len(body):
+            variants['br'] = brotlied
+    return variants
+
+
+def _parse_accept_encoding(header):
+    """解析 Accept-Encoding，返回 {编码: q值}"""
+    accepted = {}
+    for part in (header or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate(accept_encoding, variants):
+    """根据 Accept-Encoding 选择要发送的编码，没有可接受的压缩版本时返回 'identity'"""
+    if not accept_encoding or len(variants) == 1:
+        return 'identity'
+
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get('*')
+    best, best_q = 'identity', 0.0
+    for coding in _PREFERRED:
+        if coding == 'identity' or coding not in variants:
+            continue
+        q = accepted.get(coding, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
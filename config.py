@@ -8,7 +8,7 @@ class Config:
     # 飞书应用配置
     FEISHU_APP_ID = os.getenv('FEISHU_APP_ID')
     FEISHU_APP_SECRET = os.getenv('FEISHU_APP_SECRET')
-    FEISHU_API_BASE_URL = 'https://open.feishu.cn/open-apis'
+    FEISHU_API_BASE_URL = os.getenv('FEISHU_API_BASE_URL', 'https://open.feishu.cn/open-apis').rstrip('/')  # 压测时可指向本地替身服务
     FEISHU_AUTH_URL = f'{FEISHU_API_BASE_URL}/auth/v3/tenant_access_token/internal'
     FEISHU_BITABLE_URL = f'{FEISHU_API_BASE_URL}/bitable/v1'
     
@@ -22,6 +22,62 @@ class Config:
     # API请求配置
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))  # API请求超时时间（秒）
     MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))  # API请求最大重试次数
+    FEISHU_PAGE_SIZE = int(os.getenv('FEISHU_PAGE_SIZE', '500'))  # 多维表格每次请求的记录数（飞书上限500）
+    FEISHU_RECORD_PATH = os.getenv('FEISHU_RECORD_PATH', '')  # 设置后把飞书接口的请求和响应（已脱敏）录制到该文件
+    FEISHU_REPLAY_PATH = os.getenv('FEISHU_REPLAY_PATH', '')  # 设置后从该录制文件回放飞书接口响应，不访问网络
+    FEISHU_REPLAY_SPEED = float(os.getenv('FEISHU_REPLAY_SPEED', '1'))  # 回放时复现录制耗时的倍数，0 表示不等待
+    
+    # 飞书素材（图片）缓存配置
+    MEDIA_CACHE_DIR = os.getenv('MEDIA_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'media'))
+    MEDIA_MAX_BYTES = int(os.getenv('MEDIA_MAX_BYTES', str(20 * 1024 * 1024)))  # 单个素材的最大字节数
+    MEDIA_FAILURE_TTL = int(os.getenv('MEDIA_FAILURE_TTL', '60'))  # 素材下载失败后在该秒数内不再请求飞书，直接返回错误
+    IMAGE_VARIANT_WIDTHS = [int(width) for width in os.getenv('IMAGE_VARIANT_WIDTHS', '480,960,1440').split(',') if width.strip()]  # 图片缩略图宽度，留空则不生成
+    IMAGE_SIZES = os.getenv('IMAGE_SIZES', '(max-width: 800px) 100vw, 800px')  # <img sizes>，与正文最大宽度一致
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))  # 生成缩略图的线程数
+    
+    # 生产服务器配置（gunicorn.conf.py）
+    BIND = os.getenv('BIND', '0.0.0.0:8082')  # 监听地址
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', str(min(2 * (os.cpu_count() or 1) + 1, 9))))  # worker 进程数
+    WEB_THREADS = int(os.getenv('WEB_THREADS', '4'))  # 每个 worker 的线程数
+    WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', '60'))  # worker 无响应超过该秒数后重启
+    NODE_CACHE_TTL = int(os.getenv('NODE_CACHE_TTL', '3600'))  # 知识空间节点解析结果的缓存时间（秒）
+    
+    # 快照与页面再生成配置
+    SNAPSHOT_TTL = int(os.getenv('SNAPSHOT_TTL', '60'))  # 快照过期后在后台重新同步（秒）
+    PAGE_REVALIDATE_SECONDS = int(os.getenv('PAGE_REVALIDATE_SECONDS', '300'))  # 页面再生成间隔（秒）
+    PAGE_REBUILD_WORKERS = int(os.getenv('PAGE_REBUILD_WORKERS', '2'))  # 后台重建页面的线程数
+    INDEX_PAGE_SIZE = int(os.getenv('INDEX_PAGE_SIZE', '20'))  # 首页每页文章数
+    BULK_RENDER_THRESHOLD = int(os.getenv('BULK_RENDER_THRESHOLD', '200'))  # 变更记录数达到该值时用进程池批量渲染正文
+    RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', '0'))  # 批量渲染进程数，0 表示使用全部CPU核心
+    PREVIEW_LENGTH = int(os.getenv('PREVIEW_LENGTH', '100'))  # 首页预览的最多字符数
+    API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '20'))  # JSON接口默认每页条数
+    API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))  # JSON接口每页条数上限
+    SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '50'))  # 搜索结果最多返回条数
+    FEED_ENTRY_LIMIT = int(os.getenv('FEED_ENTRY_LIMIT', '50'))  # feed 中的最多文章数
+    SITE_URL = os.getenv('SITE_URL', '')  # 站点地址（如 https://example.com），用于生成 feed 和 sitemap 中的绝对链接；为空时不提供 feed 和 sitemap
+    FEED_AUTHOR = os.getenv('FEED_AUTHOR', '好文推荐')  # feed 的作者名称
+    SITEMAP_SHARD_SIZE = int(os.getenv('SITEMAP_SHARD_SIZE', '50000'))  # 每个 sitemap 分片的URL数（协议上限50000）
+    RELATED_ARTICLES_COUNT = int(os.getenv('RELATED_ARTICLES_COUNT', '5'))  # 详情页相关文章数
+    COVIEW_PATH = os.getenv('COVIEW_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'coview.json'))  # 共现推荐结果文件
+    
+    # 阅读计数与热度排行配置
+    VIEW_DB_PATH = os.getenv('VIEW_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'views.sqlite3'))
+    VIEW_FLUSH_INTERVAL = int(os.getenv('VIEW_FLUSH_INTERVAL', '5'))  # 阅读计数批量写入间隔（秒）
+    TRENDING_HALF_LIFE = int(os.getenv('TRENDING_HALF_LIFE', '86400'))  # 热度半衰期（秒）
+    
+    # 请求计时配置
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'True').lower() == 'true'  # 在响应中输出 Server-Timing 头
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '1000'))  # 超过该耗时（毫秒）的请求写入慢请求日志，0 表示关闭
+    
+    # 请求分析配置（PROFILE_SECRET 和 PROFILE_SAMPLE_RATE 都未设置时不启用）
+    PROFILE_SECRET = os.getenv('PROFILE_SECRET', '')  # 签名密钥，用于校验 X-Profile 令牌
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))  # 随机采样比例，如 0.001
+    PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'profiles'))
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '100'))  # 最多保留的分析文件数
+    
+    # 响应压缩配置（页面放入缓存时压缩一次）
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '9'))
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '512'))  # 小于该字节数的响应不压缩
     
     # Flask配置
     SECRET_KEY = os.getenv('FLASK_SECRET_KEY', os.urandom(24).hex())
@@ -30,5 +86,15 @@ class Config:
     # 日志配置
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING')
     LOG_FORMAT = '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
-    LOG_MAX_BYTES = 1024 * 1024  # 1MB
-    LOG_BACKUP_COUNT = 10
\ No newline at end of file
+    LOG_FILE = os.getenv('LOG_FILE', '')  # 日志文件路径（如 logs/app.log），默认只输出到控制台
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(1024 * 1024)))  # 1MB
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '10'))
+    LOG_ROTATION = os.getenv('LOG_ROTATION', 'size')  # size：进程内按大小轮转；external：由 logrotate 等外部工具轮转，多进程部署时使用
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))  # 日志队列长度，写入跟不上时丢弃新日志而不阻塞请求
+    
+    # 结构化访问日志（每个请求一行 JSON）
+    ACCESS_LOG_FILE = os.getenv('ACCESS_LOG_FILE', '')  # 访问日志路径（如 logs/access.log），默认不记录；日志包含客户端 IP 和 User-Agent
+    ACCESS_LOG_SAMPLE_RATE = float(os.getenv('ACCESS_LOG_SAMPLE_RATE', '1.0'))  # 记录的请求比例，高峰期可调低；5xx 总是记录
+    ACCESS_LOG_BUFFER = int(os.getenv('ACCESS_LOG_BUFFER', '256'))  # 攒够多少行写一次文件
+    ACCESS_LOG_FLUSH_SECONDS = float(os.getenv('ACCESS_LOG_FLUSH_SECONDS', '1.0'))  # 空闲超过该秒数时写出未满一批的行
+    ACCESS_LOG_MAX_BYTES = int(os.getenv('ACCESS_LOG_MAX_BYTES', str(64 * 1024 * 1024)))  # LOG_ROTATION=size 时单个文件超过后轮转，备份数同 LOG_BACKUP_COUNT
@@ -0,0 +1,169 @@
+"""正文转换：Markdown 和飞书富文本转为安全的HTML
+
+本模块只依赖配置和转换库，导入时没有副作用；bulk_render 的子进程只导入这里，
+不会重复执行 app.py 中的日志、静态资源和后台线程等初始化。
+"""
+import ast
+import html
+import json
+import logging
+from urllib.parse import urlsplit
+
+from bleach import clean
+from markdown import markdown
+from markupsafe import Markup, escape
+
+from config import Config
+from images import srcset
+from media import is_valid_token
+
+logger = logging.getLogger('app')
+
+_SAFE_URL_SCHEMES = {'', 'http', 'https', 'mailto'}
+
+
+def parse_richtext(value):
+    """正文是飞书富文本（片段列表，或其 JSON / Python repr 字符串）时返回片段列表，否则返回 None"""
+    if isinstance(value, str):
+        text = value.strip()
+        if not text.startswith('['):
+            return None
+        try:
+            value = json.loads(text)
+        except ValueError:
+            try:
+                value = ast.literal_eval(text)
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                return None
+    if isinstance(value, list) and value and all(isinstance(item, dict) and 'type' in item for item in value):
+        return value
+    return None
+
+
+def markdown_to_html(content):
+    """将Markdown转换为安全的HTML"""
+    # 确保 content 是字符串类型
+    content_str = str(content)
+    logger.debug(f"markdown_to_html: Input to markdown: type={type(content_str)}, value={content_str[:200]}...") # Log first 200 chars
+    html_content = markdown(content_str)
+    logger.debug(f"markdown_to_html: Output from markdown: type={type(html_content)}, value={html_content[:200]}...") # Log first 200 chars
+    logger.debug(f"markdown_to_html: html_content type after markdown: {type(html_content)}")
+    logger.debug(f"markdown_to_html: Input to clean: type={type(html_content)}, value={html_content[:200]}...")
+    if isinstance(html_content, list):
+        html_content = str(html_content) # Convert list to string if it's a list
+        logger.debug(f"markdown_to_html: Converted html_content from list to string: type={type(html_content)}, value={html_content[:200]}...")
+    
+    cleaned_content = clean(
+        html_content,
+        tags=['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'em', 'ul', 'ol', 'li', 'blockquote', 'code', 'pre', 'br'],
+        attributes={'*': ['class']},
+        strip=True
+    )
+    logger.debug(f"markdown_to_html: Output from clean: type={type(cleaned_content)}, value={cleaned_content[:200]}...") # Log first 200 chars
+    return cleaned_content
+
+
+def image_html(file_token, alt, image_widths=()):
+    """生成图片标签，alt 为纯文本；启用缩略图时附带 srcset/sizes，手机只下载显示所需的宽度"""
+    attributes = f'src="/media/{file_token}" alt="{escape(alt)}" loading="lazy" decoding="async"'
+    if image_widths:
+        attributes += f' srcset="{srcset(file_token, image_widths)}" sizes="{Config.IMAGE_SIZES}"'
+    return f"<img {attributes}>"
+
+
+def richtext_to_html(richtext_json, image_widths=()):
+    """将飞书富文本JSON转换为HTML；image_widths 非空时图片附带 srcset"""
+    if not richtext_json:
+        return ""
+
+    try:
+        # 确保输入是字符串，并尝试解析为JSON
+        if isinstance(richtext_json, str):
+            data = json.loads(richtext_json)
+        elif isinstance(richtext_json, (list, dict)):
+            data = richtext_json
+        else:
+            return str(richtext_json) # 如果不是JSON也不是字符串，直接转字符串
+
+        if not isinstance(data, list):
+            # 如果不是列表，尝试从字典中获取'text'字段，或者直接返回其字符串表示
+            if isinstance(data, dict) and 'text' in data:
+                return clean(data['text'], tags=[], attributes={}, strip=True)
+            return clean(str(data), tags=[], attributes={}, strip=True)
+
+        html_parts = []
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+
+            obj_type = item.get('type')
+            content = item.get('text', '')
+            url = item.get('url', '')
+            children = item.get('children', [])
+
+            # 清理内容，只保留文本，避免XSS
+            cleaned_content = clean(content, tags=[], attributes={}, strip=True)
+
+            if obj_type == 'text':
+                text = cleaned_content
+                if item.get('bold'):
+                    text = f"<strong>{text}</strong>"
+                if item.get('italic'):
+                    text = f"<em>{text}</em>"
+                if item.get('underline'):
+                    text = f"<u>{text}</u>"
+                if item.get('strikethrough'):
+                    text = f"<s>{text}</s>"
+                if item.get('code'):
+                    text = f"<code>{text}</code>"
+                html_parts.append(text)
+            elif obj_type == 'paragraph':
+                # 递归处理段落内的子元素
+                paragraph_content = richtext_to_html(children, image_widths)
+                html_parts.append(f"<p>{paragraph_content}</p>")
+            elif obj_type == 'heading1':
+                html_parts.append(f"<h1>{cleaned_content}</h1>")
+            elif obj_type == 'heading2':
+                html_parts.append(f"<h2>{cleaned_content}</h2>")
+            elif obj_type == 'heading3':
+                html_parts.append(f"<h3>{cleaned_content}</h3>")
+            elif obj_type == 'bulleted_list':
+                list_items = []
+                for child in children:
+                    if child.get('type') == 'list_item':
+                        list_items.append(f"<li>{richtext_to_html(child.get('children', []), image_widths)}</li>")
+                html_parts.append(f"<ul>{''.join(list_items)}</ul>")
+            elif obj_type == 'ordered_list':
+                list_items = []
+                for child in children:
+                    if child.get('type') == 'list_item':
+                        list_items.append(f"<li>{richtext_to_html(child.get('children', []), image_widths)}</li>")
+                html_parts.append(f"<ol>{''.join(list_items)}</ol>")
+            elif obj_type == 'code_block':
+                html_parts.append(f"<pre><code>{cleaned_content}</code></pre>")
+            elif obj_type == 'quote':
+                html_parts.append(f"<blockquote>{cleaned_content}</blockquote>")
+            elif obj_type == 'hr':
+                html_parts.append("<hr>")
+            elif obj_type == 'image':
+                # 飞书图片经 /media 代理并缓存到本地，没有 token 时显示占位符
+                file_token = item.get('token') or item.get('file_token')
+                if is_valid_token(file_token):
+                    # bleach 只转义 <、> 和 &，不转义引号；还原为纯文本后由 image_html 按属性值转义
+                    html_parts.append(f"<p>{image_html(file_token, html.unescape(cleaned_content), image_widths)}</p>")
+                else:
+                    html_parts.append(f"<p>[图片: {cleaned_content}]</p>")
+            elif obj_type == 'link':
+                href = str(url).strip()
+                if urlsplit(href).scheme.lower() not in _SAFE_URL_SCHEMES:
+                    href = '#'
+                html_parts.append(f"<a href=\"{escape(href)}\">{cleaned_content}</a>")
+            # 可以根据需要添加更多类型
+
+        return Markup(''.join(html_parts))
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON解析错误: {e} - 原始数据: {richtext_json}")
+        return clean(str(richtext_json), tags=[], attributes={}, strip=True) # 解析失败返回清理后的原始字符串
+    except Exception as e:
+        logger.error(f"富文本转换错误: {e} - 原始数据: {richtext_json}")
+        return clean(str(richtext_json), tags=[], attributes={}, strip=True)
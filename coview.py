@@ -0,0 +1,233 @@
+"""从访问日志挖掘“看过这篇的读者还看了”推荐
+
+按会话（客户端IP + User-Agent，静默超过 session_gap 秒视为新会话）切分文章阅读序列，
+统计同一会话内文章两两共现次数，按 共现次数/√(阅读数a×阅读数b) 取每篇文章的前 k 个。
+
+日志逐行流式读取；内存只保存活跃会话和共现计数，计数先写入定长缓冲区，
+缓冲区满后用 NumPy 合并去重，超过 max_pairs 时丢弃只出现一次的文章对。
+
+同时支持 common/combined 格式和应用写出的 JSON 访问日志（ACCESS_LOG_FILE）；
+JSON 日志采样记录时共现计数会相应变少，建议用 ACCESS_LOG_SAMPLE_RATE=1 的日志计算。
+
+运行：python coview.py access.log [access.log.1.gz ...] -o data/coview.json
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+from array import array
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger('app')
+
+# 兼容 werkzeug 开发服务器和 gunicorn 的 common/combined 访问日志格式
+_ACCESS_LOG_RE = re.compile(
+    r'^(?P<client>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?:GET|HEAD) (?P<path>\S+)[^"]*" (?P<status>\d{3}) \S+'
+    r'(?: "[^"]*" "(?P<agent>[^"]*)")?'
+)
+_ARTICLE_PATH_RE = re.compile(r'^/article/([^/?#]+)')
+_TIME_FORMATS = ('%d/%b/%Y:%H:%M:%S %z', '%d/%b/%Y %H:%M:%S')
+
+
+@lru_cache(maxsize=4096)
+def _parse_time(value):
+    """解析日志时间；同一秒内的时间字符串相同，结果会被缓存"""
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_json_line(line):
+    try:
+        entry = json.loads(line)
+        if entry.get('status') != 200 or entry.get('route') != '/article/<record_id>' or not entry.get('record_id'):
+            return None
+        ts = datetime.fromisoformat(entry['ts']).timestamp()
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return f"{entry.get('ip')}|{entry.get('ua') or ''}", ts, entry['record_id']
+
+
+def parse_line(line):
+    """解析一行访问日志，返回 (会话键, 时间戳, record_id)；不是成功的文章访问时返回 None"""
+    if line.startswith('{'):
+        return _parse_json_line(line)
+    match = _ACCESS_LOG_RE.match(line)
+    if not match or match.group('status') != '200':
+        return None
+    article = _ARTICLE_PATH_RE.match(match.group('path'))
+    if not article:
+        return None
+    ts = _parse_time(match.group('time'))
+    if ts is None:
+        return None
+    return f"{match.group('client')}|{match.group('agent') or ''}", ts, article.group(1)
+
+
+def _open(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+class CoViewCounter:
+    """流式累积文章共现计数"""
+
+    def __init__(self, session_gap=1800, max_session_items=20, buffer_size=1 << 20, max_pairs=5_000_000):
+        self.session_gap = session_gap
+        self.max_session_items = max_session_items
+        self.buffer_size = buffer_size
+        self.max_pairs = max_pairs
+        self.item_ids = {}
+        self.items = []
+        self.views = array('Q')
+        self._sessions = {}
+        self._buffer = array('Q')
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._counts = np.empty(0, dtype=np.uint32)
+        self._latest = 0.0
+        self._lines = 0
+
+    def _item(self, record_id):
+        item = self.item_ids.get(record_id)
+        if item is None:
+            item = self.item_ids[record_id] = len(self.items)
+            self.items.append(record_id)
+            self.views.append(0)
+        return item
+
+    def add(self, session, ts, record_id):
+        item = self._item(record_id)
+        self._latest = max(self._latest, ts)
+
+        state = self._sessions.get(session)
+        if state is None or ts - state[0] > self.session_gap:
+            state = self._sessions[session] = [ts, []]
+        state[0] = ts
+
+        seen = state[1]
+        # 同一会话重复阅读只算一次；会话过长时只保留最近的若干篇，限制两两组合的数量
+        if item not in seen:
+            self.views[item] += 1
+            for other in seen:
+                low, high = (item, other) if item < other else (other, item)
+                self._buffer.append((low << 32) | high)
+            seen.append(item)
+            if len(seen) > self.max_session_items:
+                del seen[0]
+            if len(self._buffer) >= self.buffer_size:
+                self._merge()
+
+        self._lines += 1
+        if self._lines % 10000 == 0:
+            self._expire()
+
+    def _expire(self):
+        """丢弃已经结束的会话，使内存只与活跃会话数有关"""
+        cutoff = self._latest - self.session_gap
+        expired = [session for session, state in self._sessions.items() if state[0] < cutoff]
+        for session in expired:
+            del self._sessions[session]
+
+    def _merge(self):
+        if not self._buffer:
+            return
+        chunk = np.frombuffer(self._buffer, dtype=np.uint64)
+        keys = np.concatenate([self._keys, chunk])
+        counts = np.concatenate([self._counts, np.ones(len(chunk), dtype=np.uint32)])
+        self._keys, inverse = np.unique(keys, return_inverse=True)
+        self._counts = np.bincount(inverse, weights=counts).astype(np.uint32)
+        self._buffer = array('Q')
+
+        if len(self._keys) > self.max_pairs:
+            keep = self._counts > 1
+            logger.warning(f"共现对数量超过 {self.max_pairs}，丢弃 {int((~keep).sum())} 个只出现一次的文章对")
+            self._keys, self._counts = self._keys[keep], self._counts[keep]
+
+    def top_k(self, k=5, min_count=2):
+        """返回 {record_id: [共现推荐 record_id, ...]}"""
+        self._merge()
+        if len(self._keys) == 0:
+            return {}
+
+        keep = self._counts >= min_count
+        keys, counts = self._keys[keep], self._counts[keep].astype(np.float64)
+        low = (keys >> np.uint64(32)).astype(np.int64)
+        high = (keys & np.uint64(0xFFFFFFFF)).astype(np.int64)
+
+        views = np.frombuffer(self.views, dtype=np.uint64).astype(np.float64)
+        scores = counts / np.sqrt(views[low] * views[high])
+
+        source = np.concatenate([low, high])
+        target = np.concatenate([high, low])
+        scores = np.concatenate([scores, scores])
+
+        # 先按源文章分组、组内按得分降序，再截取每组前 k 个
+        order = np.lexsort((-scores, source))
+        source, target = source[order], target[order]
+        starts = np.flatnonzero(np.r_[True, source[1:] != source[:-1]])
+        rank = np.arange(len(source)) - np.repeat(starts, np.diff(np.r_[starts, len(source)]))
+        selected = rank < k
+
+        result = {}
+        for src, dst in zip(source[selected], target[selected]):
+            result.setdefault(self.items[src], []).append(self.items[dst])
+        return result
+
+
+def build_coviews(paths, k=5, min_count=2, session_gap=1800):
+    counter = CoViewCounter(session_gap=session_gap)
+    for path in paths:
+        with _open(path) as f:
+            for line in f:
+                parsed = parse_line(line)
+                if parsed is not None:
+                    counter.add(*parsed)
+    return counter.top_k(k=k, min_count=min_count)
+
+
+def write_coviews(coviews, output):
+    """原子写入结果文件，应用在同步快照时按修改时间重新加载"""
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{output}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(coviews, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, output)
+
+
+def load_coviews(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='从访问日志计算共现推荐')
+    parser.add_argument('logs', nargs='+', help='访问日志文件，支持 .gz，- 表示标准输入')
+    parser.add_argument('-o', '--output', default=Config.COVIEW_PATH)
+    parser.add_argument('-k', type=int, default=Config.RELATED_ARTICLES_COUNT)
+    parser.add_argument('--min-count', type=int, default=2)
+    parser.add_argument('--session-gap', type=int, default=1800, help='会话静默超时（秒）')
+    args = parser.parse_args(argv)
+
+    coviews = build_coviews(args.logs, k=args.k, min_count=args.min_count, session_gap=args.session_gap)
+    write_coviews(coviews, args.output)
+    print(f"已写入 {len(coviews)} 篇文章的共现推荐: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+
+def rfc3339(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def build_entry(summary, content_html, updated, site_url):
+    """生成单篇文章的 Atom <entry> 片段，按记录修订号缓存后可直接拼接"""
+    link = f"{site_url}{summary['url']}"
+    parts = [
+        '<entry>',
+        f"<id>{escape(link)}</id>",
+        f"<title>{escape(summary['title'])}</title>",
+        f"<link rel=\"alternate\" type=\"text/html\" href={quoteattr(link)}/>",
+        f"<updated>{rfc3339(updated)}</updated>",
+    ]
+    if summary.get('quote'):
+        parts.append(f"<summary>{escape(summary['quote'])}</summary>")
+    parts.append(f"<content type=\"html\">{escape(str(content_html))}</content>")
+    parts.append('</entry>')
+    return ''.join(parts)
+
+
+def build_feed(entries, title, site_url, updated, author):
+    """拼接 Atom feed 文档；entries 为已生成的 <entry> 片段，作者在 feed 级别给出，所有条目共用"""
+    feed_url = f"{site_url}/feed.xml"
+    head = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<id>{escape(feed_url)}</id>"
+        f"<title>{escape(title)}</title>"
+        f"<link rel=\"self\" type=\"application/atom+xml\" href={quoteattr(feed_url)}/>"
+        f"<link rel=\"alternate\" type=\"text/html\" href={quoteattr(site_url + '/')}/>"
+        f"<updated>{rfc3339(updated)}</updated>"
+        f"<author><name>{escape(author)}</name></author>"
+    )
+    return head + ''.join(entries) + '</feed>'
@@ -0,0 +1,213 @@
+"""飞书接口响应的录制与回放
+
+录制：设置 FEISHU_RECORD_PATH 后，发往 FEISHU_API_BASE_URL 的请求及响应（含耗时）
+追加写入 JSON Lines 文件。访问令牌、app_secret、多维表格/节点 token 以及人员字段中的
+姓名、邮箱、ID 等会替换为占位符；请求头和请求体不写入。
+
+回放：设置 FEISHU_REPLAY_PATH 后，飞书请求不再访问网络，而是按录制顺序返回匹配的响应，
+并按 FEISHU_REPLAY_SPEED 倍数复现录制时的耗时（0 表示不等待）。匹配时忽略路径中的
+app_token、table_id 和节点 token，因此回放环境可以使用任意配置值。
+"""
+import base64
+import itertools
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# 响应中出现时需要替换的凭据字段，替换后在之后的请求地址中也保持一致
+_SECRET_KEYS = {'tenant_access_token', 'app_access_token', 'obj_token', 'app_token', 'node_token', 'space_id'}
+# 人员字段（创建人、修改人、人员类型的单元格）中的个人信息
+_PERSON_KEYS = {'id', 'name', 'en_name', 'email', 'avatar_url', 'open_id', 'union_id', 'user_id'}
+# 回放匹配时忽略的查询参数（节点 token 等环境相关的值）
+_IGNORED_PARAMS = {'token'}
+_PATH_PATTERNS = [
+    (re.compile(r'/bitable/v1/apps/[^/]+/tables/[^/]+/records'), '/bitable/v1/apps/*/tables/*/records'),
+]
+
+
+def _is_person(value):
+    return isinstance(value, dict) and ('email' in value or str(value.get('id', '')).startswith('ou_'))
+
+
+class Redactor:
+    """把凭据和个人信息替换为稳定的占位符，同一个值总是得到同一个占位符"""
+
+    def __init__(self, secrets=()):
+        self._placeholders = {}
+        self._lock = threading.Lock()
+        for secret in secrets:
+            if secret:
+                self.placeholder(secret)
+
+    def placeholder(self, value, kind='redacted'):
+        with self._lock:
+            if value not in self._placeholders:
+                self._placeholders[value] = f"<{kind}-{len(self._placeholders) + 1}>"
+            return self._placeholders[value]
+
+    def text(self, value):
+        # 先替换较长的值，避免一个值是另一个的前缀时只替换一部分
+        for secret in sorted(self._placeholders, key=len, reverse=True):
+            if secret in value:
+                value = value.replace(secret, self._placeholders[secret])
+        return value
+
+    def data(self, value):
+        if isinstance(value, dict):
+            person = _is_person(value)
+            result = {}
+            for key, item in value.items():
+                if isinstance(item, str) and (key in _SECRET_KEYS or (person and key in _PERSON_KEYS)):
+                    result[key] = self.placeholder(item, 'person' if person else 'redacted')
+                else:
+                    result[key] = self.data(item)
+            return result
+        if isinstance(value, list):
+            return [self.data(item) for item in value]
+        return value
+
+
+def normalize_path(path):
+    for pattern, replacement in _PATH_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def request_key(method, path, params):
+    """回放时用于匹配请求的键：方法、规范化路径和排序后的查询参数"""
+    params = sorted((key, str(value)) for key, value in (params or {}).items() if key not in _IGNORED_PARAMS)
+    return f"{method.upper()} {normalize_path(path)}?{'&'.join(f'{k}={v}' for k, v in params)}"
+
+
+def _split(url, base_url):
+    parts = urlsplit(url)
+    path = parts.path[len(urlsplit(base_url).path):]
+    return path, dict(parse_qsl(parts.query))
+
+
+def _build_response(entry, url):
+    response = requests.models.Response()
+    response.status_code = entry['status']
+    response.headers = CaseInsensitiveDict({'Content-Type': entry['content_type']})
+    if 'body_base64' in entry:
+        response._content = base64.b64decode(entry['body_base64'])
+    else:
+        response._content = entry['body'].encode('utf-8')
+    # 内容已完整读入，iter_content 会从 _content 中切片返回
+    response._content_consumed = True
+    response.encoding = 'utf-8'
+    response.url = url
+    response.reason = 'Replayed'
+    return response
+
+
+class _Transport:
+    """替换 requests.request / requests.get，只拦截发往 base_url 的请求"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self._saved = None
+
+    def _handles(self, url):
+        return url.startswith(self.base_url + '/')
+
+    def install(self):
+        self._saved = (requests.request, requests.get)
+        original_request, original_get = self._saved
+
+        def request(method, url, **kwargs):
+            if self._handles(url):
+                return self.send(method, url, original_request, **kwargs)
+            return original_request(method, url, **kwargs)
+
+        def get(url, params=None, **kwargs):
+            if self._handles(url):
+                return self.send('get', url, original_request, params=params, **kwargs)
+            return original_get(url, params=params, **kwargs)
+
+        requests.request, requests.get = request, get
+        return self
+
+    def uninstall(self):
+        if self._saved is not None:
+            requests.request, requests.get = self._saved
+            self._saved = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.uninstall()
+        return False
+
+
+class Recorder(_Transport):
+    def __init__(self, path, base_url, secrets=()):
+        super().__init__(base_url)
+        self.path = path
+        self.redactor = Redactor(secrets)
+        self._lock = threading.Lock()
+
+    def send(self, method, url, original_request, params=None, **kwargs):
+        start = time.perf_counter()
+        response = original_request(method, url, params=params, **kwargs)
+        content = response.content
+        elapsed = time.perf_counter() - start
+
+        path, query = _split(url, self.base_url)
+        query.update({key: str(value) for key, value in (params or {}).items()})
+        content_type = response.headers.get('Content-Type', 'application/octet-stream')
+        entry = {'method': method.upper(), 'status': response.status_code,
+                 'content_type': content_type, 'elapsed': round(elapsed, 4)}
+        if 'json' in content_type:
+            try:
+                # 先从响应中学习新的凭据，再替换请求地址，保证前后占位符一致
+                body = self.redactor.data(json.loads(content))
+                entry['body'] = json.dumps(body, ensure_ascii=False)
+            except ValueError:
+                entry['body'] = self.redactor.text(content.decode('utf-8', 'replace'))
+        elif content_type.startswith('text/'):
+            entry['body'] = self.redactor.text(content.decode('utf-8', 'replace'))
+        else:
+            entry['body_base64'] = base64.b64encode(content).decode('ascii')
+        entry['path'] = self.redactor.text(path)
+        entry['params'] = {key: self.redactor.text(value) for key, value in query.items()}
+        entry['key'] = request_key(method, entry['path'], entry['params'])
+
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return response
+
+
+class Replayer(_Transport):
+    def __init__(self, path, base_url, speed=1.0):
+        super().__init__(base_url)
+        self.speed = speed
+        entries = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries.setdefault(entry['key'], []).append(entry)
+        # 同一请求录制了多次时按顺序轮流返回，重复同步时循环使用
+        self._queues = {key: itertools.cycle(items) for key, items in entries.items()}
+        self._lock = threading.Lock()
+
+    def send(self, method, url, original_request, params=None, **kwargs):
+        path, query = _split(url, self.base_url)
+        query.update({key: str(value) for key, value in (params or {}).items()})
+        key = request_key(method, path, query)
+        with self._lock:
+            queue = self._queues.get(key)
+            entry = next(queue) if queue is not None else None
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"回放文件中没有匹配的请求：{key}")
+        if self.speed:
+            time.sleep(entry['elapsed'] * self.speed)
+        return _build_response(entry, url)
@@ -0,0 +1,30 @@
+"""gunicorn 配置：gunicorn -c gunicorn.conf.py wsgi:app
+
+进程数、线程数等取自 config.py，可用环境变量覆盖（BIND、WEB_WORKERS、WEB_THREADS、WEB_TIMEOUT）。
+"""
+import os
+
+# 多个 worker 写同一个日志文件，不能各自按大小轮转；改由 logrotate 等外部工具轮转
+os.environ.setdefault('LOG_ROTATION', 'external')
+
+from config import Config
+
+bind = Config.BIND
+workers = Config.WEB_WORKERS
+# 请求大多在等待飞书接口或读取缓存，gthread 让每个 worker 同时处理多个请求
+worker_class = 'gthread'
+threads = Config.WEB_THREADS
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+
+# 在主进程中导入应用并预热一次，worker 通过 fork 继承快照和页面缓存（写时复制）
+preload_app = True
+
+# 访问日志由应用写入 ACCESS_LOG_FILE（JSON，设置后才开启），gunicorn 自身只输出错误日志
+accesslog = None
+errorlog = '-'
+
+# worker 心跳文件放在内存文件系统中，避免磁盘繁忙时被误判为无响应
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
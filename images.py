@@ -0,0 +1,176 @@
+"""图片衍生版本：同步时为富文本中的图片生成多个宽度的缩略图，写入素材缓存
+
+依赖 Pillow（可选）。未安装时 enabled 为 False，渲染器不输出 srcset，/media 只提供原图。
+"""
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from media import is_valid_token
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+logger = logging.getLogger('app')
+
+# 只处理可以无损保持格式的静态图片，GIF 等格式直接使用原图
+_FORMATS = {'image/jpeg': 'JPEG', 'image/png': 'PNG', 'image/webp': 'WEBP'}
+
+
+def variant_token(file_token, width):
+    """衍生版本在素材缓存中的键；'@' 不是合法 token 字符，不会与原图冲突"""
+    return f"{file_token}@{width}"
+
+
+def collect_image_tokens(value, tokens=None):
+    """从飞书富文本（JSON 字符串或已解析的列表/字典）中收集图片 file_token"""
+    if tokens is None:
+        tokens = set()
+    if isinstance(value, str):
+        if value[:1] in ('[', '{'):
+            try:
+                collect_image_tokens(json.loads(value), tokens)
+            except ValueError:
+                pass
+    elif isinstance(value, list):
+        for item in value:
+            collect_image_tokens(item, tokens)
+    elif isinstance(value, dict):
+        if value.get('type') == 'image':
+            file_token = value.get('token') or value.get('file_token')
+            if is_valid_token(file_token):
+                tokens.add(file_token)
+        for child in value.values():
+            if isinstance(child, (list, dict)):
+                collect_image_tokens(child, tokens)
+    return tokens
+
+
+def srcset(file_token, widths):
+    return ', '.join(f"/media/{file_token}?w={width} {width}w" for width in sorted(widths))
+
+
+def resize_variants(data, mimetype, widths, quality=82):
+    """返回 (原图宽度, {宽度: 字节})，只生成比原图窄的版本；格式不支持时返回 (None, {})"""
+    image_format = _FORMATS.get(mimetype)
+    if Image is None or image_format is None:
+        return None, {}
+
+    with Image.open(io.BytesIO(data)) as image:
+        if getattr(image, 'is_animated', False):
+            return image.width, {}
+        # EXIF 方向为 5-8 时图片需要旋转 90 度，显示宽度对应存储的高度
+        rotated = image.getexif().get(0x0112, 1) in (5, 6, 7, 8)
+        original_width = image.height if rotated else image.width
+        targets = sorted(width for width in set(widths) if width < original_width)
+        if targets and image_format == 'JPEG':
+            # 让 JPEG 解码器直接按 1/2、1/4… 缩小解码，大图可以省掉大部分解码时间
+            scale = targets[-1] / original_width
+            image.draft('RGB', (int(image.width * scale), int(image.height * scale)))
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        elif image.mode in ('1', 'P'):
+            # 调色板图片直接缩放只能用最近邻插值，先转为 RGBA
+            image = image.convert('RGBA')
+
+        variants = {}
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            if image_format == 'JPEG':
+                resized.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+            elif image_format == 'WEBP':
+                resized.save(buffer, 'WEBP', quality=quality)
+            else:
+                resized.save(buffer, 'PNG', optimize=True)
+            variants[width] = buffer.getvalue()
+    return original_width, variants
+
+
+class ImageDerivatives:
+    """在线程池中下载图片并生成宽度版本
+
+    Pillow 的解码和缩放会释放 GIL，线程池即可并行。处理结果写回原图的缓存条目
+    （width、variants），已处理过的图片不会重复下载或缩放。
+    """
+
+    def __init__(self, media_cache, download, widths, workers=2):
+        self.media_cache = media_cache
+        self.download = download
+        self.widths = tuple(sorted(set(widths)))
+        self.workers = workers
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # 未完成的任务留在父进程中继续处理，结果写入磁盘缓存后子进程也能看到
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return Image is not None and bool(self.widths)
+
+    def submit(self, file_tokens):
+        """提交需要处理的图片，返回新提交的数量"""
+        if not self.enabled:
+            return 0
+        submitted = 0
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-variants')
+            for file_token in file_tokens:
+                if file_token in self._pending:
+                    continue
+                entry = self.media_cache.lookup(file_token)
+                if entry is not None and 'variants' in entry:
+                    continue
+                self._pending.add(file_token)
+                self._executor.submit(self._process, file_token)
+                submitted += 1
+        return submitted
+
+    def wait(self, timeout=None):
+        """等待已提交的图片处理完成，超时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def _process(self, file_token):
+        try:
+            entry, error = self.media_cache.get_or_fetch(file_token, self.download)
+            if entry is None:
+                logger.warning(f"图片 {file_token} 下载失败，跳过生成缩略图：{error}")
+                return
+            with open(entry['path'], 'rb') as f:
+                data = f.read()
+            width, variants = resize_variants(data, entry['mimetype'], self.widths)
+            for variant_width, variant_data in variants.items():
+                self.media_cache.store(variant_token(file_token, variant_width), variant_data, entry['mimetype'])
+            # 最后写入原图条目，保证 variants 中列出的版本都已落盘
+            self.media_cache.annotate(file_token, width=width, variants=sorted(variants))
+        except Exception as e:
+            logger.error(f"生成图片 {file_token} 的缩略图失败：{str(e)}")
+            # 无法解码的图片标记为没有衍生版本，之后直接使用原图，不再重复处理
+            if self.media_cache.lookup(file_token) is not None:
+                self.media_cache.annotate(file_token, width=None, variants=[])
+        finally:
+            with self._lock:
+                self._pending.discard(file_token)
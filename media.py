@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+_TOKEN_RE = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+
+def is_valid_token(file_token):
+    return bool(_TOKEN_RE.match(file_token or ''))
+
+
+class MediaCache:
+    """飞书图片/附件的本地磁盘缓存（按内容寻址）
+
+    文件内容按 SHA-256 存放在 blobs/ab/<sha256>，tokens/<file_token>.json 记录
+    file_token 到内容哈希和 MIME 类型的映射。同一 file_token 并发请求时只下载一次。
+    下载失败的 file_token 在 failure_ttl 秒内直接返回上次的错误，不再请求飞书。
+    on_lookup(result) 在每次 get_or_fetch() 时以 'hit'、'miss' 或 'failed'（处于失败缓存期内）调用。
+    """
+
+    def __init__(self, directory, on_lookup=None, failure_ttl=60):
+        self.directory = directory
+        self._on_lookup = on_lookup
+        self.failure_ttl = failure_ttl
+        # {file_token: (过期时间, 错误信息)}；只有当前快照中的 token 会被请求，数量有限
+        self._failures = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # 下载锁可能正被父进程的线程持有；子进程中还没有进行中的下载
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _token_path(self, file_token):
+        return os.path.join(self.directory, 'tokens', f"{file_token}.json")
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
+
+    def lookup(self, file_token):
+        """返回 {'sha256', 'mimetype', 'path'}，未缓存时返回 None"""
+        try:
+            with open(self._token_path(file_token), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        path = self.blob_path(entry['sha256'])
+        if not os.path.exists(path):
+            return None
+        entry['path'] = path
+        return entry
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def store(self, file_token, data, mimetype, **extra):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            self._write_atomic(path, data)
+        entry = dict(extra, sha256=digest, mimetype=mimetype)
+        self._write_atomic(self._token_path(file_token), json.dumps(entry).encode('utf-8'))
+        entry['path'] = path
+        return entry
+
+    def annotate(self, file_token, **extra):
+        """在已缓存条目上追加元数据（如图片宽度），内容不变"""
+        entry = self.lookup(file_token)
+        if entry is None:
+            return None
+        entry.pop('path')
+        entry.update(extra)
+        self._write_atomic(self._token_path(file_token), json.dumps(entry).encode('utf-8'))
+        return self.lookup(file_token)
+
+    def _lock_for(self, file_token):
+        with self._locks_guard:
+            lock = self._locks.get(file_token)
+            if lock is None:
+                lock = self._locks[file_token] = threading.Lock()
+            return lock
+
+    def _recent_failure(self, file_token):
+        failure = self._failures.get(file_token)
+        if failure is None:
+            return None
+        expires_at, error = failure
+        if time.monotonic() >= expires_at:
+            self._failures.pop(file_token, None)
+            return None
+        return error
+
+    def get_or_fetch(self, file_token, download):
+        """返回 (缓存条目, 错误信息)；download(file_token) 返回 (字节, MIME类型, 错误信息)"""
+        entry = self.lookup(file_token)
+        error = self._recent_failure(file_token) if entry is None else None
+        if self._on_lookup is not None:
+            self._on_lookup('hit' if entry is not None else ('failed' if error else 'miss'))
+        if entry is not None:
+            return entry, None
+        if error:
+            return None, error
+
+        lock = self._lock_for(file_token)
+        try:
+            with lock:
+                entry = self.lookup(file_token)
+                if entry is not None:
+                    return entry, None
+                # 等锁期间其他线程可能刚下载失败
+                error = self._recent_failure(file_token)
+                if error:
+                    return None, error
+                data, mimetype, error = download(file_token)
+                if error:
+                    if self.failure_ttl > 0:
+                        self._failures[file_token] = (time.monotonic() + self.failure_ttl, error)
+                    return None, error
+                self._failures.pop(file_token, None)
+                try:
+                    return self.store(file_token, data, mimetype), None
+                except OSError as e:
+                    return None, f"写入素材缓存失败：{e}"
+        finally:
+            with self._locks_guard:
+                self._locks.pop(file_token, None)
@@ -0,0 +1,124 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('app')
+
+
+class CachedPage:
+    """已渲染的页面、预压缩版本及其再生成时间"""
+
+    __slots__ = ('body', 'variants', 'status', 'built_at', 'revalidate_at')
+
+    def __init__(self, body, status, revalidate_seconds, compress=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.body = body
+        # 压缩只在放入缓存时做一次，请求路径只按 Accept-Encoding 取出对应版本
+        self.variants = compress(body) if compress is not None else {'identity': body}
+        self.status = status
+        self.built_at = time.time()
+        self.revalidate_at = self.built_at + revalidate_seconds
+
+    def is_stale(self, now=None):
+        return (now if now is not None else time.time()) >= self.revalidate_at
+
+
+class PageCache:
+    """按页面粒度的增量静态再生成（ISR）缓存
+
+    - 未命中：同步渲染并缓存
+    - 过期：先返回旧页面，同时在后台线程只重建这一页
+    - rebuild()：同步发现记录变更后，定向重建受影响的页面
+    """
+
+    def __init__(self, revalidate_seconds=300, max_workers=2, context_factory=None, compress=None):
+        self.revalidate_seconds = revalidate_seconds
+        self._context_factory = context_factory
+        self._compress = compress
+        self._pages = {}
+        self._renderers = {}
+        self._pending = set()
+        # 后台重建进行中时又因同步而需要重建的页面，当前这次完成后再渲染一次
+        self._rerun = set()
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='page-rebuild')
+        # fork 出的子进程不继承重建线程，需要新的线程池和锁；已缓存的页面保留
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._rerun = set()
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='page-rebuild')
+
+    def get(self, key, render):
+        """返回 (页面, 状态)，状态为 'hit'、'stale' 或 'miss'"""
+        page = self._pages.get(key)
+        if page is not None:
+            if page.is_stale():
+                self._schedule(key, render)
+                return page, 'stale'
+            return page, 'hit'
+
+        page = self._render(key, render)
+        return page, 'miss'
+
+    def rebuild(self, keys):
+        """在后台定向重建指定页面；尚未缓存过的页面等到首次访问时再渲染"""
+        for key in keys:
+            render = self._renderers.get(key)
+            if render is not None:
+                self._schedule(key, render, after_sync=True)
+
+    def discard(self, key):
+        with self._lock:
+            self._pages.pop(key, None)
+            self._renderers.pop(key, None)
+
+    def keys(self):
+        return list(self._pages)
+
+    def _schedule(self, key, render, after_sync=False):
+        with self._lock:
+            if key in self._pending:
+                # 进行中的过期重建可能读到的是同步前的快照，不能把同步触发的重建合并掉
+                if after_sync:
+                    self._rerun.add(key)
+                return
+            self._pending.add(key)
+        self._executor.submit(self._background_render, key, render)
+
+    def _background_render(self, key, render):
+        try:
+            if self._context_factory is not None:
+                with self._context_factory():
+                    self._render(key, render)
+            else:
+                self._render(key, render)
+        except Exception as e:
+            logger.error(f"后台重建页面 {key} 失败，继续使用旧页面: {str(e)}")
+        finally:
+            with self._lock:
+                rerun = key in self._rerun
+                self._rerun.discard(key)
+                if not rerun:
+                    self._pending.discard(key)
+                render = self._renderers.get(key, render)
+            if rerun:
+                self._executor.submit(self._background_render, key, render)
+
+    def _render(self, key, render):
+        body, status = render()
+        page = CachedPage(body, status, self.revalidate_seconds, compress=self._compress)
+        # 服务端错误不缓存，避免把一次临时故障固定下来；后台重建失败时保留旧页面
+        if status < 500:
+            with self._lock:
+                self._pages[key] = page
+                self._renderers[key] = render
+            logger.info(f"页面 {key} 已重新生成")
+        return page
@@ -0,0 +1,103 @@
+import re
+import unicodedata
+from html.parser import HTMLParser
+
+from markdown import markdown
+
+# 截断时优先停在这些标点之后
+_BREAK_AFTER = set('。！？；：，、…）》」』】.!?;:,)]')
+_SPACE_RE = re.compile(r'\s+')
+_SKIP_TAGS = {'script', 'style'}
+_BLOCK_TAGS = {'p', 'div', 'br', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'tr', 'hr'}
+
+
+class _TextExtractor(HTMLParser):
+    """提取HTML中的纯文本，块级元素之间补一个空格"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def markdown_to_text(content):
+    """将 Markdown 渲染后去掉标记，得到单行纯文本"""
+    extractor = _TextExtractor()
+    extractor.feed(markdown(content))
+    extractor.close()
+    return _SPACE_RE.sub(' ', ''.join(extractor.parts)).strip()
+
+
+def _extends_cluster(char, previous):
+    """判断 char 是否与前一个字符属于同一个字素簇（组合符、变体选择符、ZWJ 序列、肤色修饰等）"""
+    code = ord(char)
+    if unicodedata.combining(char) or unicodedata.category(char) in ('Mn', 'Me', 'Mc'):
+        return True
+    if 0xFE00 <= code <= 0xFE0F or 0xE0100 <= code <= 0xE01EF or 0xE0020 <= code <= 0xE007F:
+        return True
+    if code == 0x200D or 0x1F3FB <= code <= 0x1F3FF:
+        return True
+    return previous == '\u200d'
+
+
+def graphemes(text):
+    """把文本切分为用户可见的字符（近似的扩展字素簇）"""
+    cluster = ''
+    regional = 0
+    for char in text:
+        is_regional = 0x1F1E6 <= ord(char) <= 0x1F1FF
+        if cluster and (_extends_cluster(char, cluster[-1]) or (is_regional and regional == 1)):
+            cluster += char
+            regional = regional + 1 if is_regional else 0
+            continue
+        if cluster:
+            yield cluster
+        cluster = char
+        regional = 1 if is_regional else 0
+    if cluster:
+        yield cluster
+
+
+def truncate(text, limit=100, lookback=20, ellipsis='…'):
+    """按字素截断到 limit 个字符以内，尽量停在空白或标点处"""
+    clusters = []
+    for cluster in graphemes(text):
+        clusters.append(cluster)
+        if len(clusters) > limit:
+            break
+    if len(clusters) <= limit:
+        return text
+
+    clusters = clusters[:limit]
+    for cut in range(limit, max(0, limit - lookback), -1):
+        cluster = clusters[cut - 1]
+        if cluster in _BREAK_AFTER:
+            clusters = clusters[:cut]
+            break
+        if cluster.isspace():
+            clusters = clusters[:cut - 1]
+            break
+    return ''.join(clusters).rstrip() + ellipsis
+
+
+def make_preview(content, limit=100):
+    """生成文章预览纯文本：渲染并去除 Markdown 标记后按字素截断"""
+    if not content:
+        return ''
+    return truncate(markdown_to_text(str(content)), limit=limit)
@@ -0,0 +1,121 @@
+"""按需对生产请求做 cProfile 采样
+
+触发方式：
+- 请求头 X-Profile 或查询参数 _profile 携带签名令牌（需要配置 PROFILE_SECRET）
+- 按 PROFILE_SAMPLE_RATE 随机采样
+
+结果以 pstats 格式写入 PROFILE_DIR，只保留最新的 PROFILE_MAX_FILES 个文件，
+可用 `python -m pstats <文件>` 或 snakeviz 查看。两者都未配置时 app 不注册任何钩子。
+
+生成令牌：python profiling.py sign --ttl 3600
+"""
+import argparse
+import cProfile
+import hashlib
+import hmac
+import os
+import random
+import re
+import threading
+import time
+
+_LABEL_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def sign(secret, ttl=3600, now=None):
+    """生成在 ttl 秒内有效的令牌：<过期时间>.<HMAC-SHA256>"""
+    expires = int((now if now is not None else time.time()) + ttl)
+    digest = hmac.new(secret.encode('utf-8'), str(expires).encode('ascii'), hashlib.sha256).hexdigest()
+    return f"{expires}.{digest}"
+
+
+def verify(secret, token, now=None):
+    if not secret or not token:
+        return False
+    expires, _, digest = token.partition('.')
+    if not expires.isdigit() or int(expires) < (now if now is not None else time.time()):
+        return False
+    expected = hmac.new(secret.encode('utf-8'), expires.encode('ascii'), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+class RequestProfiler:
+    """同一进程同一时间只分析一个请求，其他请求照常处理，不等待"""
+
+    def __init__(self, directory, secret='', sample_rate=0.0, max_files=100):
+        self.directory = directory
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self._busy = threading.Lock()
+        self._rotate_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.secret) or self.sample_rate > 0
+
+    def should_profile(self, token):
+        if token and verify(self.secret, token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """开始分析，已有请求在分析时返回 None"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 其他分析工具（如调试器）已占用
+            self._busy.release()
+            return None
+        return profile
+
+    def finish(self, profile, label):
+        """停止分析并写入文件，返回文件名"""
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{_LABEL_RE.sub('_', label).strip('_')[:80]}.prof"
+        profile.dump_stats(os.path.join(self.directory, filename))
+        self._rotate()
+        return filename
+
+    def _rotate(self):
+        with self._rotate_lock:
+            try:
+                paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.prof')]
+            except OSError:
+                return
+            if len(paths) <= self.max_files:
+                return
+            paths.sort(key=_mtime)
+            for path in paths[:len(paths) - self.max_files]:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
+if __name__ == '__main__':
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='生成请求分析令牌')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    sign_parser = subcommands.add_parser('sign', help='生成 X-Profile 令牌')
+    sign_parser.add_argument('--ttl', type=int, default=3600, help='有效期（秒）')
+    args = parser.parse_args()
+
+    if not Config.PROFILE_SECRET:
+        parser.error('未配置 PROFILE_SECRET')
+    print(sign(Config.PROFILE_SECRET, args.ttl))
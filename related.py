@@ -0,0 +1,127 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from search import tokenize
+
+
+class SparseMatrix:
+    """按行 L2 归一化的稀疏 TF-IDF 矩阵（CSR），内存与非零元素数成正比
+
+    columns() 按需生成按列排列的副本（CSC），近邻计算按词遍历时使用。
+    """
+
+    __slots__ = ('shape', 'indptr', 'indices', 'data', '_columns')
+
+    def __init__(self, shape, indptr, indices, data):
+        self.shape = shape
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self._columns = None
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    def columns(self):
+        """返回 (列指针, 行号, 值)"""
+        if self._columns is None:
+            order = np.argsort(self.indices, kind='stable')
+            rows = np.repeat(np.arange(self.shape[0], dtype=np.int32), np.diff(self.indptr))
+            colptr = np.zeros(self.shape[1] + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=self.shape[1]), out=colptr[1:])
+            self._columns = (colptr, rows[order], self.data[order])
+        return self._columns
+
+
+def build_tfidf(texts, max_features=1024, min_df=2, max_df=0.5):
+    """构建按行 L2 归一化的稀疏 TF-IDF 矩阵（SparseMatrix，形状为 文档数×词表大小）
+
+    词表只保留 min_df ≤ 文档频率 ≤ max_df×文档数 的词，按在全部文档中的 TF-IDF 权重之和
+    取前 max_features 个：只按文档频率取会留下 max_df 以下最常见、区分度最低的词。
+    """
+    counts = [Counter(tokenize(text)) for text in texts]
+    n = len(counts)
+    df = Counter()
+    for doc in counts:
+        df.update(doc.keys())
+
+    upper = max(min_df, int(max_df * n))
+    idf = {term: math.log((1.0 + n) / (1.0 + freq)) + 1.0
+           for term, freq in df.items() if min_df <= freq <= upper}
+    total = Counter()
+    for doc in counts:
+        for term, tf in doc.items():
+            weight = idf.get(term)
+            if weight is not None:
+                total[term] += (1.0 + math.log(tf)) * weight
+    selected = sorted(total, key=lambda term: (-total[term], term))[:max_features]
+    vocabulary = {term: j for j, term in enumerate(selected)}
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    indices, data = [], []
+    for i, doc in enumerate(counts):
+        row = [(vocabulary[term], (1.0 + math.log(tf)) * idf[term]) for term, tf in doc.items() if term in vocabulary]
+        norm = math.sqrt(sum(value * value for _, value in row))
+        for j, value in sorted(row):
+            indices.append(j)
+            data.append(value / norm)
+        indptr[i + 1] = len(indices)
+    return SparseMatrix((n, len(vocabulary)), indptr,
+                        np.array(indices, dtype=np.int32), np.array(data, dtype=np.float32))
+
+
+def top_k_neighbours(matrix, k=5, block_size=512, min_score=0.05):
+    """分块计算余弦相似度，返回每行最相似的 k 个行号列表
+
+    每次只计算 block_size×文档数 的相似度块，内存占用与文档数线性相关而不是平方。
+    块内按词累加：块中含某个词的行与所有含该词的文档的权重外积，只触及非零元素。
+    """
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return [[] for _ in range(n)]
+
+    colptr, col_rows, col_values = matrix.columns()
+    indptr, indices, data = matrix.indptr, matrix.indices, matrix.data
+    neighbours = []
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        scores = np.zeros((end - start, n), dtype=np.float32)
+
+        lo, hi = indptr[start], indptr[end]
+        block_rows = np.repeat(np.arange(end - start), np.diff(indptr[start:end + 1]))
+        order = np.argsort(indices[lo:hi], kind='stable')
+        block_cols, block_rows, block_values = indices[lo:hi][order], block_rows[order], data[lo:hi][order]
+        terms, bounds = np.unique(block_cols, return_index=True)
+        bounds = np.append(bounds, len(block_cols))
+        for term, a, b in zip(terms, bounds[:-1], bounds[1:]):
+            docs = col_rows[colptr[term]:colptr[term + 1]]
+            values = col_values[colptr[term]:colptr[term + 1]]
+            scores[block_rows[a:b, None], docs] += block_values[a:b, None] * values
+
+        rows = np.arange(end - start)
+        scores[rows, rows + start] = -1.0  # 排除自身
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for indices_row, values in zip(top, top_scores):
+            neighbours.append([int(j) for j, score in zip(indices_row, values) if score >= min_score])
+    return neighbours
+
+
+def build_related(documents, k=5, max_features=1024, block_size=512):
+    """documents 为 {record_id: 文本}，返回 {record_id: [相关 record_id, ...]}"""
+    record_ids = list(documents)
+    if len(record_ids) < 2:
+        return {record_id: [] for record_id in record_ids}
+
+    matrix = build_tfidf([documents[record_id] for record_id in record_ids], max_features=max_features)
+    neighbours = top_k_neighbours(matrix, k=k, block_size=block_size)
+    return {record_id: [record_ids[j] for j in row] for record_id, row in zip(record_ids, neighbours)}
@@ -0,0 +1,204 @@
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+
+# 连续的中日韩字符切成二元组，拉丁字母和数字按单词切分
+_TOKEN_RE = re.compile(
+    r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+'
+    r'|[0-9a-zA-Z\u00c0-\u024f]+'
+)
+_CJK_START = '\u3040'
+
+
+def tokenize(text):
+    """将文本切分为检索词：CJK 文本取相邻字符二元组，其余取小写单词"""
+    tokens = []
+    for run in _TOKEN_RE.findall(text or ''):
+        if run[0] >= _CJK_START:
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+
+class SearchIndex:
+    """内存倒排索引，BM25 排序
+
+    每个检索词的倒排表是两个紧凑数组（文档号、加权词频）。文档更新时旧文档号只做
+    删除标记、新内容分配新的文档号追加到倒排表末尾，因此倒排表始终有序且只追加；
+    删除标记过多时整体压缩一次。
+
+    CJK 文本只索引二元组，单字查询展开为包含该字的所有二元组（_char_terms 记录字到二元组的映射）。
+    """
+
+    def __init__(self, field_weights=None, k1=1.2, b=0.75):
+        self.field_weights = field_weights or {'title': 3, 'quote': 2, 'comment': 2, 'body': 1}
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._postings = {}
+        self._df = {}
+        self._char_terms = {}
+        self._doc_ids = []
+        self._doc_len = array('f')
+        self._doc_norm = array('f')
+        self._doc_terms = []
+        self._live = {}
+        self._total_len = 0.0
+        self._deleted = 0
+
+    def __len__(self):
+        return len(self._live)
+
+    def update(self, documents, removed=()):
+        """增量更新：documents 为 {record_id: {字段名: 文本}}，removed 为要删除的 record_id"""
+        with self._lock:
+            for record_id in removed:
+                self._remove(record_id)
+            for record_id, fields in documents.items():
+                self._remove(record_id)
+                self._add(record_id, fields)
+            if self._deleted > max(1000, len(self._doc_ids) // 4):
+                self._compact()
+            self._refresh_norms()
+
+    def _refresh_norms(self):
+        """预先计算每个文档的 BM25 长度归一化项，查询时不再逐个计算"""
+        n = len(self._live)
+        avgdl = (self._total_len / n if n else 0.0) or 1.0
+        k1, b = self.k1, self.b
+        self._doc_norm = array('f', (k1 * (1 - b + b * length / avgdl) for length in self._doc_len))
+
+    def _add(self, record_id, fields):
+        counts = Counter()
+        for name, text in fields.items():
+            weight = self.field_weights.get(name, 1)
+            field_counts = Counter(tokenize(text))
+            if weight != 1:
+                for token in field_counts:
+                    field_counts[token] *= weight
+            counts.update(field_counts)
+
+        doc = len(self._doc_ids)
+        length = float(sum(counts.values()))
+        self._doc_ids.append(record_id)
+        self._doc_len.append(length)
+        self._doc_terms.append(tuple(counts))
+        self._live[record_id] = doc
+        self._total_len += length
+
+        all_postings, df = self._postings, self._df
+        for token, tf in counts.items():
+            postings = all_postings.get(token)
+            if postings is None:
+                postings = all_postings[token] = (array('I'), array('H'))
+                self._index_chars(token)
+            postings[0].append(doc)
+            postings[1].append(min(tf, 65535))
+            df[token] = df.get(token, 0) + 1
+
+    def _remove(self, record_id):
+        doc = self._live.pop(record_id, None)
+        if doc is None:
+            return
+        self._total_len -= self._doc_len[doc]
+        for token in self._doc_terms[doc]:
+            self._df[token] -= 1
+        self._doc_ids[doc] = None
+        self._doc_terms[doc] = ()
+        self._deleted += 1
+
+    def _compact(self):
+        """丢弃已删除的文档，重新编号"""
+        old_doc_ids, old_len = self._doc_ids, self._doc_len
+        old_postings = self._postings
+        remap = {}
+        self._doc_ids, self._doc_len = [], array('f')
+        for doc, record_id in enumerate(old_doc_ids):
+            if record_id is not None:
+                remap[doc] = len(self._doc_ids)
+                self._doc_ids.append(record_id)
+                self._doc_len.append(old_len[doc])
+        self._doc_terms = [self._doc_terms[doc] for doc in sorted(remap)]
+        self._live = {self._doc_ids[new]: new for new in range(len(self._doc_ids))}
+
+        self._postings = {}
+        for token, (docs, tfs) in old_postings.items():
+            new_docs, new_tfs = array('I'), array('H')
+            for doc, tf in zip(docs, tfs):
+                new = remap.get(doc)
+                if new is not None:
+                    new_docs.append(new)
+                    new_tfs.append(tf)
+            if new_docs:
+                self._postings[token] = (new_docs, new_tfs)
+        self._df = {token: count for token, count in self._df.items() if count > 0}
+        self._char_terms = {}
+        for token in self._postings:
+            self._index_chars(token)
+        self._deleted = 0
+
+    def _index_chars(self, token):
+        if len(token) == 2 and token[0] >= _CJK_START:
+            for char in set(token):
+                self._char_terms.setdefault(char, set()).add(token)
+
+    def _char_postings(self, char):
+        """单字查询：合并该字本身及所有包含它的二元组的倒排表，按文档累加词频
+
+        字在词中间时同时出现在前后两个二元组里，词频是近似值，只影响同一查询内的排序。
+        """
+        tfs = {}
+        get = tfs.get
+        for token in (char, *self._char_terms.get(char, ())):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            for doc, tf in zip(*postings):
+                tfs[doc] = get(doc, 0) + tf
+        return tfs
+
+    def search(self, query, limit=20):
+        """返回按 BM25 得分排序的 [(record_id, 得分)]"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            n = len(self._live)
+            if n == 0:
+                return []
+            k1 = self.k1
+            doc_ids, doc_norm = self._doc_ids, self._doc_norm
+            scores = {}
+            get = scores.get
+            for term in terms:
+                if len(term) == 1 and term >= _CJK_START:
+                    tfs = self._char_postings(term)
+                    pairs = tfs.items()
+                    df = sum(1 for doc in tfs if doc_ids[doc] is not None)
+                else:
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        continue
+                    pairs = zip(*postings)
+                    df = self._df.get(term, 0)
+                if df <= 0:
+                    continue
+                weight = math.log(1 + (n - df + 0.5) / (df + 0.5)) * (k1 + 1)
+                for doc, tf in pairs:
+                    scores[doc] = get(doc, 0.0) + weight * tf / (tf + doc_norm[doc])
+
+            # 已删除的文档只在取结果时过滤
+            live = ((doc, score) for doc, score in scores.items() if doc_ids[doc] is not None)
+            top = heapq.nlargest(limit, live, key=lambda item: item[1])
+            return [(doc_ids[doc], score) for doc, score in top]
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+_XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _w3c_date(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class SitemapShard:
+    __slots__ = ('digest', 'body', 'lastmod')
+
+    def __init__(self, digest, body, lastmod):
+        self.digest = digest
+        self.body = body
+        self.lastmod = lastmod
+
+
+class Sitemaps:
+    """按快照生成分片 sitemap 和 sitemap 索引
+
+    记录按表格顺序每 shard_size 条分为一片，每片以其中记录的 (record_id, 修订号) 计算摘要；
+    同步后只重新生成摘要变化的分片，lastmod 取片内记录的最新修改时间，
+    爬虫据此只需重新抓取发生变化的分片。
+    """
+
+    def __init__(self, shard_size=50000, compress=None):
+        self.shard_size = shard_size
+        self._compress = compress or (lambda body: {'identity': body})
+        self._lock = threading.Lock()
+        self.version = None
+        self.site_url = None
+        self.shards = []
+        self.index = None
+        self.index_digest = None
+        self.index_lastmod = 0
+
+    def refresh(self, snapshot, site_url):
+        """根据快照更新分片，返回重新生成的分片数"""
+        with self._lock:
+            if self.version == snapshot.version and self.site_url == site_url:
+                return 0
+
+            record_ids = [record.get('record_id') for record in snapshot.records if record.get('record_id')]
+            chunks = [record_ids[i:i + self.shard_size] for i in range(0, len(record_ids), self.shard_size)] or [[]]
+
+            shards, rebuilt = [], 0
+            for number, chunk in enumerate(chunks):
+                digest = hashlib.sha1(site_url.encode('utf-8'))
+                for record_id in chunk:
+                    digest.update(f"{record_id}:{snapshot.revisions[record_id]}\n".encode('utf-8'))
+                digest = digest.hexdigest()
+
+                previous = self.shards[number] if number < len(self.shards) else None
+                if previous is not None and previous.digest == digest:
+                    shards.append(previous)
+                    continue
+                lastmod = max((snapshot.modified[record_id] for record_id in chunk), default=snapshot.built_at)
+                body = self._build_shard(chunk, snapshot, site_url, include_home=(number == 0)).encode('utf-8')
+                shards.append(SitemapShard(digest, self._compress(body), lastmod))
+                rebuilt += 1
+
+            if rebuilt or len(shards) != len(self.shards):
+                self.index_lastmod = max(shard.lastmod for shard in shards)
+                self.index = self._compress(self._build_index(shards, site_url).encode('utf-8'))
+                self.index_digest = hashlib.sha1(''.join(shard.digest for shard in shards).encode('ascii')).hexdigest()
+            self.shards = shards
+            self.version = snapshot.version
+            self.site_url = site_url
+            return rebuilt
+
+    def _build_shard(self, record_ids, snapshot, site_url, include_home=False):
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>\n', f'<urlset xmlns="{_XMLNS}">']
+        if include_home:
+            parts.append(f"<url><loc>{escape(site_url)}/</loc></url>")
+        for record_id in record_ids:
+            parts.append(
+                f"<url><loc>{escape(site_url)}/article/{escape(record_id)}</loc>"
+                f"<lastmod>{_w3c_date(snapshot.modified[record_id])}</lastmod></url>"
+            )
+        parts.append('</urlset>')
+        return ''.join(parts)
+
+    def _build_index(self, shards, site_url):
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>\n', f'<sitemapindex xmlns="{_XMLNS}">']
+        for number, shard in enumerate(shards, start=1):
+            parts.append(
+                f"<sitemap><loc>{escape(site_url)}/sitemap-{number}.xml</loc>"
+                f"<lastmod>{_w3c_date(shard.lastmod)}</lastmod></sitemap>"
+            )
+        parts.append('</sitemapindex>')
+        return ''.join(parts)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import threading
+import time
+
+
+def record_revision(record):
+    """根据记录字段计算修订号，字段内容不变则修订号不变"""
+    fields = record.get('fields', record) if isinstance(record, dict) else record
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class Snapshot:
+    """一次同步得到的多维表格记录（只读），按表格顺序保存并可按 record_id 查找"""
+
+    __slots__ = ('version', 'built_at', 'records', 'by_id', 'revisions', 'modified')
+
+    def __init__(self, records, version=0, built_at=None, previous=None):
+        self.version = version
+        self.built_at = built_at if built_at is not None else time.time()
+        self.records = list(records)
+        self.by_id = {}
+        self.revisions = {}
+        self.modified = {}
+        for record in self.records:
+            record_id = record.get('record_id')
+            if not record_id:
+                continue
+            revision = record_revision(record)
+            self.by_id[record_id] = record
+            self.revisions[record_id] = revision
+            self.modified[record_id] = self._modified_time(record, revision, previous)
+
+    def _modified_time(self, record, revision, previous):
+        """记录修改时间：优先使用飞书的 last_modified_time（毫秒），否则取首次见到该修订的时间"""
+        last_modified = record.get('last_modified_time')
+        if isinstance(last_modified, (int, float)) and last_modified > 0:
+            return last_modified / 1000
+        record_id = record.get('record_id')
+        if previous is not None and previous.revisions.get(record_id) == revision:
+            return previous.modified[record_id]
+        return self.built_at
+
+    def get(self, record_id):
+        return self.by_id.get(record_id)
+
+    def __len__(self):
+        return len(self.records)
+
+
+class RevisionCache:
+    """按记录修订号缓存派生数据（渲染后的HTML、片段等），记录内容变化后自动失效
+
+    on_lookup(result) 在每次 get() 时以 'hit' 或 'miss' 调用，用于统计命中率。
+    """
+
+    def __init__(self, on_lookup=None):
+        self._items = {}
+        self._lock = threading.Lock()
+        self._on_lookup = on_lookup
+
+    def get(self, record_id, revision, build):
+        entry = self._items.get(record_id)
+        if entry is not None and entry[0] == revision:
+            if self._on_lookup is not None:
+                self._on_lookup('hit')
+            return entry[1]
+        if self._on_lookup is not None:
+            self._on_lookup('miss')
+        value = build()
+        with self._lock:
+            self._items[record_id] = (revision, value)
+        return value
+
+    def put(self, record_id, revision, value):
+        with self._lock:
+            self._items[record_id] = (revision, value)
+
+    def prune(self, snapshot):
+        """丢弃快照中已不存在或已过期修订的条目"""
+        with self._lock:
+            for record_id in list(self._items):
+                if snapshot.revisions.get(record_id) != self._items[record_id][0]:
+                    del self._items[record_id]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def diff_snapshots(old, new):
+    """比较两个快照，返回新增、修改或删除的 record_id 集合"""
+    if old is None:
+        return set(new.revisions)
+
+    changed = set()
+    for record_id, revision in new.revisions.items():
+        if old.revisions.get(record_id) != revision:
+            changed.add(record_id)
+    changed.update(set(old.revisions) - set(new.revisions))
+    return changed
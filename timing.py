@@ -0,0 +1,106 @@
+"""请求阶段计时：用 with phase('markdown'): ... 记录各阶段耗时，输出为 Server-Timing 响应头
+
+当前请求的计时器保存在 ContextVar 中；后台线程里没有计时器，phase() 返回共享的空操作对象，
+因此同一段代码在请求路径和后台任务中都可以直接使用。
+"""
+import time
+from contextvars import ContextVar
+
+_current = ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    """一次请求的阶段耗时；同名阶段多次出现时累加"""
+
+    __slots__ = ('start', 'phases', 'notes', 'lookups')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.notes = {}
+        self.lookups = {}
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def note(self, name, description):
+        """记录没有耗时的说明，例如缓存命中状态"""
+        self.notes[name] = description
+
+    def lookup(self, layer, result):
+        """记录缓存查找结果；同一层多次查找结果不同时记为 partial"""
+        previous = self.lookups.get(layer)
+        self.lookups[layer] = result if previous is None or previous == result else 'partial'
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def header(self, total=None):
+        """生成 Server-Timing 头，耗时单位为毫秒"""
+        parts = [f'{name};desc="{description}"' for name, description in self.notes.items()]
+        parts.extend(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items())
+        parts.append(f"total;dur={(total if total is not None else self.elapsed()) * 1000:.2f}")
+        return ', '.join(parts)
+
+
+class _Phase:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def start_request():
+    """为当前请求创建计时器，返回 (计时器, 用于 finish_request 的令牌)"""
+    timer = RequestTimer()
+    return timer, _current.set(timer)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def phase(name):
+    """计时一个阶段；不在请求中时不做任何事"""
+    timer = _current.get()
+    if timer is None:
+        return _NULL_PHASE
+    return _Phase(timer, name)
+
+
+def note(name, description):
+    timer = _current.get()
+    if timer is not None:
+        timer.note(name, description)
+
+
+def lookup(layer, result):
+    timer = _current.get()
+    if timer is not None:
+        timer.lookup(layer, result)
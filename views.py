@@ -0,0 +1,155 @@
+import atexit
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger('app')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS view_counts (
+    record_id TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    score REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+_UPSERT = """
+INSERT INTO view_counts (record_id, total, score, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT(record_id) DO UPDATE SET
+    total = total + excluded.total,
+    score = score * decay(excluded.updated_at - updated_at) + excluded.score,
+    updated_at = excluded.updated_at
+"""
+
+
+class _Stripe:
+    __slots__ = ('lock', 'counts')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+
+class ViewCounter:
+    """文章阅读计数：请求路径只在分段计数器上加一，后台线程定期批量写入 SQLite
+
+    热度分数按半衰期指数衰减：score = score × 0.5^(Δt / half_life) + 新增阅读数。
+    衰减在 SQL 中完成，多个进程可以共用同一个数据库文件。
+    """
+
+    def __init__(self, db_path, flush_interval=5, half_life=86400, stripes=16):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.half_life = half_life
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        # 线程首次计数时轮流分配分段；线程 ID 按 16 字节以上对齐，不能直接取模
+        self._local = threading.local()
+        self._next_stripe = itertools.count()
+        self._scores = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        # fork 出的子进程不继承线程，需要在首次计数时重新启动刷新线程
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._thread = None
+        self._flush_lock = threading.Lock()
+        for stripe in self._stripes:
+            stripe.lock = threading.Lock()
+            stripe.counts = {}
+
+    def increment(self, record_id):
+        """记录一次阅读；按线程分段加锁，不同线程之间几乎不竞争"""
+        if self._thread is None:
+            self.start()
+        stripe = getattr(self._local, 'stripe', None)
+        if stripe is None:
+            stripe = self._local.stripe = self._stripes[next(self._next_stripe) % len(self._stripes)]
+        with stripe.lock:
+            stripe.counts[record_id] = stripe.counts.get(record_id, 0) + 1
+
+    def start(self):
+        """启动后台刷新线程"""
+        with self._flush_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='view-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        self.refresh()
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _connect(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.create_function('decay', 1, lambda dt: 0.5 ** (max(dt, 0.0) / self.half_life), deterministic=True)
+        conn.execute(_SCHEMA)
+        return conn
+
+    def _drain(self):
+        pending = {}
+        for stripe in self._stripes:
+            with stripe.lock:
+                counts, stripe.counts = stripe.counts, {}
+            for record_id, count in counts.items():
+                pending[record_id] = pending.get(record_id, 0) + count
+        return pending
+
+    def flush(self):
+        """把内存中的增量批量写入数据库，并刷新热度排行"""
+        with self._flush_lock:
+            pending = self._drain()
+            if not pending:
+                return
+            now = time.time()
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.executemany(_UPSERT, [(record_id, count, float(count), now)
+                                                   for record_id, count in pending.items()])
+                finally:
+                    conn.close()
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"写入阅读计数失败，本批 {sum(pending.values())} 次阅读已丢弃: {str(e)}")
+                return
+        self.refresh()
+
+    def refresh(self):
+        """从数据库读取按当前时间衰减后的热度分数"""
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT record_id, score * decay(? - updated_at) FROM view_counts", (time.time(),)
+                ).fetchall()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"读取热度排行失败: {str(e)}")
+            return
+        self._scores = dict(rows)
+
+    def score(self, record_id):
+        return self._scores.get(record_id, 0.0)
+
+    def rank(self, record_ids):
+        """按热度从高到低排序，热度相同时保持原有顺序"""
+        scores = self._scores
+        return sorted(record_ids, key=lambda record_id: -scores.get(record_id, 0.0))
@@ -0,0 +1,8 @@
+"""生产环境 WSGI 入口：gunicorn -c gunicorn.conf.py wsgi:app
+
+导入时预热访问令牌、节点解析和快照。gunicorn.conf.py 启用了 preload_app，
+预热只在主进程执行一次，之后 fork 出的 worker 继承已就绪的缓存，第一个请求不需要等待飞书接口。
+"""
+from app import app, warm_up
+
+warm_up()